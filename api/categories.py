@@ -1,20 +1,22 @@
 from typing import Optional
 from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
-from fastapi.responses import JSONResponse
-from fastapi_pagination import Page, add_pagination, paginate
+from fastapi_pagination import Page, Params, add_pagination
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from crud.user_repository import get_user_by_id
+from api.pagination import create_db_page, get_limit_offset
+from api.responses import construct_from, trusted_response
 from crud.category_repository import (
+    count_categories,
     create_category,
     delete_category,
     get_categories,
     get_category_by_slug,
 )
-from db.database import get_session
+from db.database import get_read_session, get_session
 from schemas.review_schema import CategoryBase
-from schemas.user_schema import UserAuth
-from security.security import get_user_from_token
+from schemas.user_schema import CurrentUser
+from security.security import get_current_user
 from security.user_permissions import is_admin
 
 
@@ -25,41 +27,44 @@ categoryrouter = APIRouter()
 async def create_new_category(
     category_data: CategoryBase,
     session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    request_user: CurrentUser = Depends(get_current_user),
 ):
-    request_user = await get_user_by_id(session, user_auth_data.id)
     permission = is_admin(request_user)
     if permission:
-        category = await get_category_by_slug(session, category_data.slug)
-        if category:
+        try:
+            new_category = await create_category(session, category_data)
+        except IntegrityError:
             raise HTTPException(
                 detail="Slug should be unique! Choose another slug",
                 status_code=status.HTTP_400_BAD_REQUEST,
             )
-        new_category = await create_category(session, category_data)
-        category = CategoryBase.model_validate(new_category)
+        category = construct_from(CategoryBase, new_category)
 
-        return JSONResponse(
-            content=category.model_dump(), status_code=status.HTTP_201_CREATED
-        )
+        return trusted_response(category, status.HTTP_201_CREATED)
 
 
 @categoryrouter.get("/", response_model=Page[CategoryBase])
 async def get_all_categories(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     filter_name: Optional[str] = Query(None),
+    params: Params = Depends(),
 ):
-    categories = await get_categories(session, filter_name)
-    return paginate(categories)
+    limit, offset = get_limit_offset(params)
+    categories = await get_categories(session, filter_name, limit, offset)
+    page = await create_db_page(
+        categories,
+        params,
+        lambda: count_categories(session, filter_name),
+    )
+    return trusted_response(page)
 
 
 @categoryrouter.delete("/{slug}/")
 async def delete_category_by_slug(
     slug: str,
     session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    request_user: CurrentUser = Depends(get_current_user),
 ):
-    request_user = await get_user_by_id(session, user_auth_data.id)
     permission = is_admin(request_user)
     if permission:
         category = await get_category_by_slug(session, slug)
@@ -1,22 +1,43 @@
-from fastapi import APIRouter, HTTPException, Response, Depends, Path, status
-from fastapi.responses import JSONResponse
-from fastapi_pagination import Page, add_pagination, paginate
+from typing import Optional
+
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Request,
+    Response,
+    Depends,
+    Path,
+    status,
+)
+from fastapi_pagination import Page, Params, add_pagination
+from fastapi_pagination.cursor import CursorPage, CursorParams
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.conditional import conditional_response, make_etag
+from api.pagination import (
+    create_db_page,
+    create_keyset_page,
+    get_keyset,
+    get_limit_offset,
+)
+from api.responses import trusted_response
 from crud.comments_repository import (
+    count_comments,
     delete_comment,
     get_comment_by_id,
     get_comments,
+    get_comments_keyset,
+    get_comments_validators,
+    get_comment_updated_at,
     create_comment,
     update_comment_info,
 )
 from crud.reviews_repository import get_review_by_id
-from crud.user_repository import get_user_by_id
-from db.database import get_session
+from db.database import get_read_session, get_session
 from models.review import Comment, Review
 from schemas.review_schema import CommentCreate, CommentOut
-from schemas.user_schema import UserAuth
-from security.security import get_user_from_token
+from schemas.user_schema import CurrentUser
+from security.security import get_current_user
 from security.user_permissions import is_admin_moderator_or_author
 
 
@@ -41,44 +62,67 @@ async def get_review_or_404(session: AsyncSession, review_id: int) -> Review:
     return review
 
 
+async def comments_not_modified(
+    request: Request, response: Response, session: AsyncSession, review_id: int
+) -> Optional[Response]:
+    validators = await get_comments_validators(session, review_id)
+    if not validators:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Review not found!"
+        )
+    last_modified, comments_count = validators
+    etag = make_etag(review_id, comments_count, last_modified)
+    return conditional_response(request, response, etag, last_modified)
+
+
+async def comment_not_modified(
+    request: Request, response: Response, session: AsyncSession, comment_id: int
+) -> Optional[Response]:
+    updated_at = await get_comment_updated_at(session, comment_id)
+    if not updated_at:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found!"
+        )
+    etag = make_etag(comment_id, updated_at.isoformat())
+    return conditional_response(request, response, etag, updated_at)
+
+
 @commentsrouter.post("/", response_model=CommentOut)
 async def create_new_comment(
     comment_data: CommentCreate,
     review_id: int = Path(..., review="The id of the review"),
     session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    request_user: CurrentUser = Depends(get_current_user),
 ):
-    request_user = await get_user_by_id(session, user_auth_data.id)
     review = await get_review_or_404(session, review_id)
     new_comment = await create_comment(
         session, comment_data, request_user.id, review.id
     )
-    comment_out = CommentOut(
+    comment_out = CommentOut.model_construct(
         id=new_comment.id,
         text=new_comment.text,
-        author=new_comment.author.username,
+        author=request_user.username,
         pub_date=new_comment.pub_date,
     )
 
-    response_content = comment_out.model_dump()
-    # Преобразуем datetime в строку ISO 8601
-    response_content["pub_date"] = comment_out.pub_date.isoformat()
-
-    return JSONResponse(
-        content=response_content,
-        status_code=status.HTTP_201_CREATED,
-    )
+    return trusted_response(comment_out, status.HTTP_201_CREATED)
 
 
 @commentsrouter.get("/", response_model=Page[CommentOut])
 async def get_all_comments(
+    request: Request,
+    response: Response,
     review_id: int = Path(..., review="The id of the review"),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
+    params: Params = Depends(),
 ):
-    review = await get_review_or_404(session, review_id)
-    comments = await get_comments(session, review.id)
+    not_modified = await comments_not_modified(request, response, session, review_id)
+    if not_modified:
+        return not_modified
+    limit, offset = get_limit_offset(params)
+    comments = await get_comments(session, review_id, limit, offset)
     comments_out = [
-        CommentOut(
+        CommentOut.model_construct(
             id=comment.id,
             text=comment.text,
             author=comment.author.username,
@@ -86,23 +130,63 @@ async def get_all_comments(
         )
         for comment in comments
     ]
-    return paginate(comments_out)
+    page = await create_db_page(
+        comments_out, params, lambda: count_comments(session, review_id)
+    )
+    return trusted_response(page, headers=response.headers)
+
+
+@commentsrouter.get("/cursor/", response_model=CursorPage[CommentOut])
+async def get_comments_by_cursor(
+    request: Request,
+    response: Response,
+    review_id: int = Path(..., review="The id of the review"),
+    session: AsyncSession = Depends(get_read_session),
+    params: CursorParams = Depends(),
+):
+    not_modified = await comments_not_modified(request, response, session, review_id)
+    if not_modified:
+        return not_modified
+    rows = await get_comments_keyset(
+        session, review_id, params.size + 1, get_keyset(params)
+    )
+    page_rows = rows[: params.size]
+    comments_out = [
+        CommentOut.model_construct(
+            id=comment.id,
+            text=comment.text,
+            author=comment.author.username,
+            pub_date=comment.pub_date,
+        )
+        for comment, _ in page_rows
+    ]
+    next_keyset = None
+    if len(rows) > params.size and page_rows:
+        last_comment, last_pub_date = page_rows[-1]
+        next_keyset = (last_pub_date, last_comment.id)
+    page = create_keyset_page(comments_out, params, next_keyset)
+    return trusted_response(page, headers=response.headers)
 
 
 @commentsrouter.get("/{comment_id}/", response_model=CommentOut)
 async def get_review(
+    request: Request,
+    response: Response,
     comment_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
+    not_modified = await comment_not_modified(request, response, session, comment_id)
+    if not_modified:
+        return not_modified
     comment = await get_comment_or_404(session, comment_id)
-    comment_out = CommentOut(
+    comment_out = CommentOut.model_construct(
         id=comment.id,
         text=comment.text,
         author=comment.author.username,
         pub_date=comment.pub_date,
     )
 
-    return comment_out
+    return trusted_response(comment_out, headers=response.headers)
 
 
 @commentsrouter.patch("/{comment_id}/", response_model=CommentOut)
@@ -110,10 +194,9 @@ async def update_review(
     comment_id: int,
     new_comment_data: CommentCreate,
     session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    request_user: CurrentUser = Depends(get_current_user),
 ):
     comment_to_update = await get_comment_or_404(session, comment_id)
-    request_user = await get_user_by_id(session, user_auth_data.id)
     permission = is_admin_moderator_or_author(request_user, comment_to_update)
     if permission:
         updated_comment = await update_comment_info(
@@ -121,24 +204,23 @@ async def update_review(
             comment_to_update,
             new_comment_data,
         )
-        review_out = CommentOut(
+        review_out = CommentOut.model_construct(
             id=updated_comment.id,
             text=updated_comment.text,
             author=updated_comment.author.username,
             pub_date=updated_comment.pub_date,
         )
 
-        return review_out
+        return trusted_response(review_out)
 
 
 @commentsrouter.delete("/{comment_id}/")
 async def delete_review_by_id(
     comment_id: int,
     session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    request_user: CurrentUser = Depends(get_current_user),
 ):
     comment_to_delete = await get_comment_or_404(session, comment_id)
-    request_user = await get_user_by_id(session, user_auth_data.id)
     permission = is_admin_moderator_or_author(request_user, comment_to_delete)
     if permission:
         deleted = await delete_comment(session, comment_to_delete)
@@ -0,0 +1,106 @@
+import csv
+import io
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Awaitable, Callable, Sequence
+
+import orjson
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+
+from config import EXPORT_CHUNK_SIZE
+from crud.comments_repository import stream_comments_export
+from crud.reviews_repository import stream_reviews_export
+from crud.titles_repository import stream_titles_export
+from db.database import async_read_session
+from schemas.user_schema import CurrentUser
+from security.security import get_current_user
+from security.user_permissions import is_admin
+
+
+exportrouter = APIRouter()
+
+OpenStream = Callable[[AsyncSession, int], Awaitable[AsyncResult]]
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def _encode_ndjson(rows: Sequence[Row]) -> bytes:
+    return b"".join(orjson.dumps(row._asdict()) + b"\n" for row in rows)
+
+
+def _encode_csv(rows: Sequence[Row]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in row
+        )
+    return buffer.getvalue().encode()
+
+
+async def _stream_rows(
+    open_stream: OpenStream, export_format: ExportFormat
+) -> AsyncIterator[bytes]:
+    # Сессия живёт столько же, сколько ответ: зависимости FastAPI закрываются
+    # раньше, чем StreamingResponse дочитает курсор
+    async with async_read_session() as session:
+        result = await open_stream(session, EXPORT_CHUNK_SIZE)
+        if export_format == ExportFormat.CSV:
+            yield _encode_csv([list(result.keys())])
+        encode = _encode_csv if export_format == ExportFormat.CSV else _encode_ndjson
+        async for rows in result.partitions():
+            yield encode(rows)
+
+
+def export_response(
+    open_stream: OpenStream, export_format: ExportFormat, name: str
+) -> StreamingResponse:
+    filename = f"{name}.{export_format.value}"
+    return StreamingResponse(
+        _stream_rows(open_stream, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@exportrouter.get("/titles/")
+async def export_titles(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    request_user: CurrentUser = Depends(get_current_user),
+):
+    permission = is_admin(request_user)
+    if permission:
+        return export_response(stream_titles_export, export_format, "titles")
+
+
+@exportrouter.get("/reviews/")
+async def export_reviews(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    request_user: CurrentUser = Depends(get_current_user),
+):
+    permission = is_admin(request_user)
+    if permission:
+        return export_response(stream_reviews_export, export_format, "reviews")
+
+
+@exportrouter.get("/comments/")
+async def export_comments(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    request_user: CurrentUser = Depends(get_current_user),
+):
+    permission = is_admin(request_user)
+    if permission:
+        return export_response(stream_comments_export, export_format, "comments")
@@ -1,20 +1,22 @@
 from typing import Optional
 from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
-from fastapi.responses import JSONResponse
-from fastapi_pagination import Page, add_pagination, paginate
+from fastapi_pagination import Page, Params, add_pagination
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from crud.user_repository import get_user_by_id
+from api.pagination import create_db_page, get_limit_offset
+from api.responses import construct_from, trusted_response
 from crud.genres_repository import (
+    count_genres,
     create_genre,
     get_genre_by_slug,
     get_genres,
     delete_genre,
 )
-from db.database import get_session
+from db.database import get_read_session, get_session
 from schemas.review_schema import GenreBase
-from schemas.user_schema import UserAuth
-from security.security import get_user_from_token
+from schemas.user_schema import CurrentUser
+from security.security import get_current_user
 from security.user_permissions import is_admin
 
 
@@ -25,41 +27,44 @@ genresrouter = APIRouter()
 async def create_new_genre(
     genre_data: GenreBase,
     session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    request_user: CurrentUser = Depends(get_current_user),
 ):
-    request_user = await get_user_by_id(session, user_auth_data.id)
     permission = is_admin(request_user)
     if permission:
-        category = await get_genre_by_slug(session, genre_data.slug)
-        if category:
+        try:
+            new_genre = await create_genre(session, genre_data)
+        except IntegrityError:
             raise HTTPException(
                 detail="Slug should be unique! Choose another slug",
                 status_code=status.HTTP_400_BAD_REQUEST,
             )
-        new_genre = await create_genre(session, genre_data)
-        genre = GenreBase.model_validate(new_genre)
+        genre = construct_from(GenreBase, new_genre)
 
-        return JSONResponse(
-            content=genre.model_dump(), status_code=status.HTTP_201_CREATED
-        )
+        return trusted_response(genre, status.HTTP_201_CREATED)
 
 
 @genresrouter.get("/", response_model=Page[GenreBase])
 async def get_all_genres(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     filter_name: Optional[str] = Query(None),
+    params: Params = Depends(),
 ):
-    categories = await get_genres(session, filter_name)
-    return paginate(categories)
+    limit, offset = get_limit_offset(params)
+    genres = await get_genres(session, filter_name, limit, offset)
+    page = await create_db_page(
+        genres,
+        params,
+        lambda: count_genres(session, filter_name),
+    )
+    return trusted_response(page)
 
 
 @genresrouter.delete("/{slug}/")
 async def delete_genre_by_slug(
     slug: str,
     session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    request_user: CurrentUser = Depends(get_current_user),
 ):
-    request_user = await get_user_by_id(session, user_auth_data.id)
     permission = is_admin(request_user)
     if permission:
         category = await get_genre_by_slug(session, slug)
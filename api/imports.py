@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.responses import trusted_response
+from config import IMPORT_BATCH_SIZE
+from crud.import_repository import import_datasets
+from db.database import get_session
+from schemas.import_schema import ImportReport
+from schemas.user_schema import CurrentUser
+from security.security import get_current_user
+from security.user_permissions import is_admin
+from utils.import_formats import ImportDataError, get_dataset, parse_rows
+
+
+importrouter = APIRouter()
+
+
+@importrouter.post("/{dataset}/", response_model=ImportReport)
+async def import_dataset(
+    dataset: str,
+    request: Request,
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1),
+    session: AsyncSession = Depends(get_session),
+    request_user: CurrentUser = Depends(get_current_user),
+):
+    permission = is_admin(request_user)
+    if permission:
+        content_type = request.headers.get("content-type", "").split(";")[0]
+        try:
+            rows = parse_rows(await request.body(), content_type)
+            report = await import_datasets(
+                session, [(get_dataset(dataset), rows)], batch_size
+            )
+        except ImportDataError as error:
+            raise HTTPException(
+                detail=str(error), status_code=status.HTTP_400_BAD_REQUEST
+            )
+        except IntegrityError as error:
+            raise HTTPException(
+                detail=f"Import conflicts with existing data: {error.orig}",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        return trusted_response(report, status.HTTP_201_CREATED)
@@ -1,7 +1,7 @@
 import uuid
 
 from fastapi import APIRouter, HTTPException, Depends, status
-from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -10,9 +10,10 @@ from db.database import get_session
 from crud.user_repository import (
     create_user,
     get_user_by_username,
-    get_user_by_email,
     update_confirmation_code,
 )
+from api.responses import trusted_response
+from api.users import user_conflict_error
 from utils.send_email import send_confirmation_code
 from security.security import authenticate_user, create_access_token
 from security.pwd_crypt import get_hashed_code
@@ -30,35 +31,22 @@ async def signup_and_get_confirmation_code(
     user_data: UserCreate,
     session: AsyncSession = Depends(get_session),
 ):
-    user_by_username = await get_user_by_username(session, user_data.username)
-    user_by_email = await get_user_by_email(session, user_data.email)
-
-    if user_by_username and user_by_email:
-        code = create_confirmation_code()
-        hashed_code = get_hashed_code(code)
-
-        await update_confirmation_code(session, user_by_username, hashed_code)
-        await send_confirmation_code(user_data.email, code)
-        return JSONResponse(
-            content=user_data.model_dump(), status_code=status.HTTP_200_OK
-        )
-    if user_by_username:
-        raise HTTPException(
-            detail="Username already taken", status_code=status.HTTP_400_BAD_REQUEST
-        )
-    if user_by_email:
-        raise HTTPException(
-            detail="Email already registered", status_code=status.HTTP_400_BAD_REQUEST
-        )
-
     code = create_confirmation_code()
-    hashed_code = get_hashed_code(code)
+    hashed_code = await get_hashed_code(code)
+
+    try:
+        await create_user(session, user_data, hashed_code)
+    except IntegrityError as error:
+        # Пользователь уже есть: с той же парой username/email выдаём новый код
+        user_by_username = await get_user_by_username(session, user_data.username)
+        if not user_by_username or user_by_username.email != user_data.email:
+            raise user_conflict_error(error)
+        await update_confirmation_code(session, user_by_username, hashed_code)
 
-    new_user = await create_user(session, user_data, hashed_code)
-    await send_confirmation_code(new_user.email, code)
-    user = UserCreate(username=new_user.username, email=new_user.email)
+    await send_confirmation_code(session, user_data.email, code)
+    user = UserCreate(username=user_data.username, email=user_data.email)
 
-    return JSONResponse(content=user.model_dump(), status_code=status.HTTP_200_OK)
+    return trusted_response(user)
 
 
 @loginroute.post("/token/")
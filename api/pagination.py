@@ -0,0 +1,74 @@
+import json
+from typing import Awaitable, Callable, Optional, Sequence, TypeVar
+
+from fastapi import HTTPException, Response, status
+from fastapi_pagination import Params, create_page
+from fastapi_pagination.bases import AbstractPage
+from fastapi_pagination.cursor import CursorParams
+
+
+T = TypeVar("T")
+
+# Ключ курсора: (pub_date в том виде, как он хранится в БД, id)
+Keyset = tuple[str, int]
+
+
+def get_limit_offset(params: Params) -> tuple[int, int]:
+    raw_params = params.to_raw_params()
+    return raw_params.limit, raw_params.offset
+
+
+async def _get_total(
+    items: Sequence, params: Params, count: Callable[[], Awaitable[int]]
+) -> int:
+    # Неполная страница уже знает total, COUNT нужен только для полных страниц
+    limit, offset = get_limit_offset(params)
+    if len(items) < limit and (items or offset == 0):
+        return offset + len(items)
+    return await count()
+
+
+async def create_db_page(
+    items: Sequence[T],
+    params: Params,
+    count: Callable[[], Awaitable[int]],
+) -> AbstractPage[T]:
+    total = await _get_total(items, params, count)
+    return create_page(items, total=total, params=params)
+
+
+async def create_json_page(
+    documents: Sequence[str],
+    params: Params,
+    count: Callable[[], Awaitable[int]],
+) -> Response:
+    # Элементы уже сериализованы: сериализуются только поля самой страницы
+    total = await _get_total(documents, params, count)
+    page = create_page([], total=total, params=params)
+    page_fields = page.model_dump_json(exclude={"items"})
+    content = '{"items":[' + ",".join(documents) + "]," + page_fields[1:]
+    return Response(content=content, media_type="application/json")
+
+
+def get_keyset(params: CursorParams) -> Optional[Keyset]:
+    cursor = params.to_raw_params().cursor
+    if not cursor:
+        return None
+    try:
+        pub_date, obj_id = json.loads(cursor)
+        return str(pub_date), int(obj_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            detail="Invalid cursor value", status_code=status.HTTP_400_BAD_REQUEST
+        )
+
+
+def create_keyset_page(
+    items: Sequence[T], params: CursorParams, next_keyset: Optional[Keyset]
+) -> AbstractPage[T]:
+    return create_page(
+        items,
+        params=params,
+        current=params.to_raw_params().cursor,
+        next_=json.dumps(next_keyset) if next_keyset else None,
+    )
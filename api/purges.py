@@ -0,0 +1,56 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi_pagination import Page, Params, add_pagination
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.pagination import create_db_page, get_limit_offset
+from api.responses import construct_from, trusted_response
+from crud.purge_repository import count_purge_jobs, get_purge_job_by_id, get_purge_jobs
+from db.database import get_read_session
+from models.purge import PurgeStatus
+from schemas.purge_schema import PurgeJobOut
+from schemas.user_schema import CurrentUser
+from security.security import get_current_user
+from security.user_permissions import is_admin
+
+
+purgesrouter = APIRouter()
+
+
+@purgesrouter.get("/", response_model=Page[PurgeJobOut])
+async def get_all_purge_jobs(
+    session: AsyncSession = Depends(get_read_session),
+    request_user: CurrentUser = Depends(get_current_user),
+    filter_status: Optional[PurgeStatus] = Query(None, alias="status"),
+    params: Params = Depends(),
+):
+    permission = is_admin(request_user)
+    if permission:
+        limit, offset = get_limit_offset(params)
+        jobs = await get_purge_jobs(session, filter_status, limit, offset)
+        page = await create_db_page(
+            [construct_from(PurgeJobOut, job) for job in jobs],
+            params,
+            lambda: count_purge_jobs(session, filter_status),
+        )
+        return trusted_response(page)
+
+
+@purgesrouter.get("/{job_id}/", response_model=PurgeJobOut)
+async def get_purge_job(
+    job_id: int,
+    session: AsyncSession = Depends(get_read_session),
+    request_user: CurrentUser = Depends(get_current_user),
+):
+    permission = is_admin(request_user)
+    if permission:
+        job = await get_purge_job_by_id(session, job_id)
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Purge job not found!"
+            )
+        return trusted_response(construct_from(PurgeJobOut, job))
+
+
+add_pagination(purgesrouter)
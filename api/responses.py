@@ -0,0 +1,26 @@
+from typing import Any, Mapping, Optional, TypeVar
+
+from fastapi import status
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def construct_from(schema: type[M], obj: Any) -> M:
+    # Строки из нашей БД уже прошли валидацию при записи: поля копируются как есть
+    return schema.model_construct(
+        **{name: getattr(obj, name) for name in schema.model_fields}
+    )
+
+
+def trusted_response(
+    content: BaseModel,
+    status_code: int = status.HTTP_200_OK,
+    headers: Optional[Mapping[str, str]] = None,
+) -> ORJSONResponse:
+    # Минует повторную проверку по response_model: dump сразу уходит в orjson
+    return ORJSONResponse(
+        content=content.model_dump(), status_code=status_code, headers=headers
+    )
@@ -1,24 +1,45 @@
-from fastapi import APIRouter, HTTPException, Response, Depends, Path, status
-from fastapi.responses import JSONResponse
-from fastapi_pagination import Page, add_pagination, paginate
+from typing import Optional
+
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Request,
+    Response,
+    Depends,
+    Path,
+    status,
+)
+from fastapi_pagination import Page, Params, add_pagination
+from fastapi_pagination.cursor import CursorPage, CursorParams
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.comments import commentsrouter
+from api.conditional import conditional_response, make_etag
+from api.pagination import (
+    create_db_page,
+    create_keyset_page,
+    get_keyset,
+    get_limit_offset,
+)
+from api.responses import trusted_response
 from crud.reviews_repository import (
+    count_reviews,
     delete_review,
     get_review_by_id,
     get_reviews,
-    review_exists,
+    get_reviews_keyset,
+    get_reviews_validators,
+    get_review_updated_at,
     create_review,
     update_review_info,
 )
 from crud.titles_repository import get_title_by_id
-from crud.user_repository import get_user_by_id
-from db.database import get_session
+from db.database import get_read_session, get_session
 from models.review import Review, Title
 from schemas.review_schema import ReviewCreate, ReviewOut
-from schemas.user_schema import UserAuth
-from security.security import get_user_from_token
+from schemas.user_schema import CurrentUser
+from security.security import get_current_user
 from security.user_permissions import is_admin_moderator_or_author
 
 
@@ -43,50 +64,74 @@ async def get_title_or_404(session: AsyncSession, title_id: int) -> Title:
     return title
 
 
+async def reviews_not_modified(
+    request: Request, response: Response, session: AsyncSession, title_id: int
+) -> Optional[Response]:
+    validators = await get_reviews_validators(session, title_id)
+    if not validators:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Title not found!"
+        )
+    last_modified, reviews_count = validators
+    etag = make_etag(title_id, reviews_count, last_modified)
+    return conditional_response(request, response, etag, last_modified)
+
+
+async def review_not_modified(
+    request: Request, response: Response, session: AsyncSession, review_id: int
+) -> Optional[Response]:
+    updated_at = await get_review_updated_at(session, review_id)
+    if not updated_at:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Review not found!"
+        )
+    etag = make_etag(review_id, updated_at.isoformat())
+    return conditional_response(request, response, etag, updated_at)
+
+
 @reviewsrouter.post("/", response_model=ReviewOut)
 async def create_new_review(
     review_data: ReviewCreate,
     title_id: int = Path(..., title="The id of the title"),
     session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    request_user: CurrentUser = Depends(get_current_user),
 ):
-    request_user = await get_user_by_id(session, user_auth_data.id)
     title = await get_title_or_404(session, title_id)
-    review = await review_exists(session, request_user.id, title.id)
-    if review:
+    try:
+        new_review = await create_review(
+            session, review_data, request_user.id, title.id
+        )
+    except IntegrityError:
         raise HTTPException(
             detail="You already reviewed this title",
             status_code=status.HTTP_400_BAD_REQUEST,
         )
-
-    new_review = await create_review(session, review_data, request_user.id, title_id)
-    review_out = ReviewOut(
+    review_out = ReviewOut.model_construct(
         id=new_review.id,
         text=new_review.text,
         score=new_review.score,
-        author=new_review.author.username,
+        author=request_user.username,
         pub_date=new_review.pub_date,
     )
 
-    response_content = review_out.model_dump()
-    # Преобразуем datetime в строку ISO 8601
-    response_content["pub_date"] = review_out.pub_date.isoformat()
-
-    return JSONResponse(
-        content=response_content,
-        status_code=status.HTTP_201_CREATED,
-    )
+    return trusted_response(review_out, status.HTTP_201_CREATED)
 
 
 @reviewsrouter.get("/", response_model=Page[ReviewOut])
 async def get_all_reviews(
+    request: Request,
+    response: Response,
     title_id: int = Path(..., title="The id of the title"),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
+    params: Params = Depends(),
 ):
-    title = await get_title_or_404(session, title_id)
-    reviews = await get_reviews(session, title.id)
+    not_modified = await reviews_not_modified(request, response, session, title_id)
+    if not_modified:
+        return not_modified
+    limit, offset = get_limit_offset(params)
+    reviews = await get_reviews(session, title_id, limit, offset)
     reviews_out = [
-        ReviewOut(
+        ReviewOut.model_construct(
             id=review.id,
             text=review.text,
             score=review.score,
@@ -95,16 +140,57 @@ async def get_all_reviews(
         )
         for review in reviews
     ]
-    return paginate(reviews_out)
+    page = await create_db_page(
+        reviews_out, params, lambda: count_reviews(session, title_id)
+    )
+    return trusted_response(page, headers=response.headers)
+
+
+@reviewsrouter.get("/cursor/", response_model=CursorPage[ReviewOut])
+async def get_reviews_by_cursor(
+    request: Request,
+    response: Response,
+    title_id: int = Path(..., title="The id of the title"),
+    session: AsyncSession = Depends(get_read_session),
+    params: CursorParams = Depends(),
+):
+    not_modified = await reviews_not_modified(request, response, session, title_id)
+    if not_modified:
+        return not_modified
+    rows = await get_reviews_keyset(
+        session, title_id, params.size + 1, get_keyset(params)
+    )
+    page_rows = rows[: params.size]
+    reviews_out = [
+        ReviewOut.model_construct(
+            id=review.id,
+            text=review.text,
+            score=review.score,
+            author=review.author.username,
+            pub_date=review.pub_date,
+        )
+        for review, _ in page_rows
+    ]
+    next_keyset = None
+    if len(rows) > params.size and page_rows:
+        last_review, last_pub_date = page_rows[-1]
+        next_keyset = (last_pub_date, last_review.id)
+    page = create_keyset_page(reviews_out, params, next_keyset)
+    return trusted_response(page, headers=response.headers)
 
 
 @reviewsrouter.get("/{review_id}/", response_model=ReviewOut)
 async def get_review(
+    request: Request,
+    response: Response,
     review_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
+    not_modified = await review_not_modified(request, response, session, review_id)
+    if not_modified:
+        return not_modified
     review = await get_review_or_404(session, review_id)
-    review_out = ReviewOut(
+    review_out = ReviewOut.model_construct(
         id=review.id,
         text=review.text,
         score=review.score,
@@ -112,7 +198,7 @@ async def get_review(
         pub_date=review.pub_date,
     )
 
-    return review_out
+    return trusted_response(review_out, headers=response.headers)
 
 
 @reviewsrouter.patch("/{review_id}/", response_model=ReviewOut)
@@ -120,10 +206,9 @@ async def update_review(
     review_id: int,
     new_review_data: ReviewCreate,
     session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    request_user: CurrentUser = Depends(get_current_user),
 ):
     review_to_update = await get_review_or_404(session, review_id)
-    request_user = await get_user_by_id(session, user_auth_data.id)
     permission = is_admin_moderator_or_author(request_user, review_to_update)
     if permission:
         updated_review = await update_review_info(
@@ -131,7 +216,7 @@ async def update_review(
             review_to_update,
             new_review_data,
         )
-        review_out = ReviewOut(
+        review_out = ReviewOut.model_construct(
             id=updated_review.id,
             text=updated_review.text,
             score=updated_review.score,
@@ -139,17 +224,16 @@ async def update_review(
             pub_date=updated_review.pub_date,
         )
 
-        return review_out
+        return trusted_response(review_out)
 
 
 @reviewsrouter.delete("/{review_id}/")
 async def delete_review_by_id(
     review_id: int,
     session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    request_user: CurrentUser = Depends(get_current_user),
 ):
     review_to_delete = await get_review_or_404(session, review_id)
-    request_user = await get_user_by_id(session, user_auth_data.id)
     permission = is_admin_moderator_or_author(request_user, review_to_delete)
     if permission:
         deleted = await delete_review(session, review_to_delete)
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends
+
+from crud.reference_cache import get_reference_cache_stats
+from db.query_stats import get_route_query_stats
+from schemas.user_schema import CurrentUser
+from security.pwd_crypt import get_pwd_hashing_stats
+from security.security import get_current_user
+from security.user_permissions import is_admin
+from utils.single_flight import get_single_flight_stats
+
+
+statsrouter = APIRouter()
+
+
+@statsrouter.get("/queries/")
+async def get_query_stats(request_user: CurrentUser = Depends(get_current_user)):
+    permission = is_admin(request_user)
+    if permission:
+        return get_route_query_stats()
+
+
+@statsrouter.get("/single-flight/")
+async def get_coalesced_read_stats(
+    request_user: CurrentUser = Depends(get_current_user),
+):
+    permission = is_admin(request_user)
+    if permission:
+        return get_single_flight_stats()
+
+
+@statsrouter.get("/reference-cache/")
+async def get_reference_stats(request_user: CurrentUser = Depends(get_current_user)):
+    permission = is_admin(request_user)
+    if permission:
+        return get_reference_cache_stats()
+
+
+@statsrouter.get("/password-hashing/")
+async def get_password_hashing_stats(
+    request_user: CurrentUser = Depends(get_current_user),
+):
+    permission = is_admin(request_user)
+    if permission:
+        return get_pwd_hashing_stats()
@@ -1,29 +1,35 @@
-from typing import Optional
+from typing import Optional, Union
 
-from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
-from fastapi.responses import JSONResponse
-from fastapi_pagination import Page, add_pagination, paginate
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
+from fastapi_pagination import Page, Params, add_pagination
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from crud.genres_repository import get_genre_by_slug
+from api.conditional import conditional_response, make_etag
+from api.pagination import create_json_page, get_limit_offset
+from api.responses import construct_from, trusted_response
+from crud.genres_repository import get_genres_by_slugs
 from crud.titles_repository import (
+    count_titles,
     create_title,
     delete_title,
     get_title_by_id,
     get_title_by_id_with_avg_score,
-    get_titles_with_avg_score,
+    get_title_document_by_id,
+    get_title_documents,
+    get_title_updated_at,
     update_title_info,
 )
-from crud.user_repository import get_user_by_id
 from crud.category_repository import (
     get_category_by_slug,
 )
-from db.database import get_session
+from db.database import get_read_session, get_session
 from models.review import Category, Genre, Title
 from schemas.review_schema import CategoryBase, TitleCreate, TitleOut, GenreBase
-from schemas.user_schema import UserAuth
-from security.security import get_user_from_token
+from schemas.user_schema import CurrentUser
+from security.security import get_current_user
 from security.user_permissions import is_admin
+from utils.purge_worker import purge_worker
+from utils.response_cache import titles_response_cache
 from api.reviews import reviewsrouter
 
 
@@ -42,6 +48,23 @@ async def get_title_with_score_or_404(
     return title, avg_score
 
 
+def get_titles_cache_params(
+    searching_filters: dict[str, Union[str, int, None]], params: Params
+) -> dict:
+    # Равнозначные запросы должны давать один ключ: порядок значений в фильтрах
+    # с семантикой "любое из" и лишние пробелы в поиске на выдачу не влияют
+    cache_params = {"page": params.page, "size": params.size}
+    for key, value in searching_filters.items():
+        if value is None or value == "":
+            continue
+        if key in ("genres", "genre_slug"):
+            value = sorted(set(value.split(",")))
+        elif key == "search":
+            value = " ".join(value.split())
+        cache_params[key] = value
+    return cache_params
+
+
 async def get_category_or_400(session: AsyncSession, slug: str) -> Category:
     category = await get_category_by_slug(session, slug)
     if not category:
@@ -53,15 +76,15 @@ async def get_category_or_400(session: AsyncSession, slug: str) -> Category:
 
 
 async def get_genres_or_400(session: AsyncSession, genres: list[str]) -> list[Genre]:
-    list_of_genres: list[Genre] = []
-    for genre_slug in genres:
-        genre = await get_genre_by_slug(session, genre_slug)
-        if not genre:
-            raise HTTPException(
-                detail=f"Genre: {genre_slug} not found",
-                status_code=status.HTTP_400_BAD_REQUEST,
-            )
-        list_of_genres.append(genre)
+    genre_slugs = list(dict.fromkeys(genres))
+    list_of_genres = await get_genres_by_slugs(session, genre_slugs)
+    if len(list_of_genres) < len(genre_slugs):
+        found_slugs = {genre.slug for genre in list_of_genres}
+        missing_slugs = [slug for slug in genre_slugs if slug not in found_slugs]
+        raise HTTPException(
+            detail=f"Genre: {', '.join(missing_slugs)} not found",
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
     return list_of_genres
 
 
@@ -69,92 +92,95 @@ async def get_genres_or_400(session: AsyncSession, genres: list[str]) -> list[Ge
 async def create_new_title(
     title_data: TitleCreate,
     session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    request_user: CurrentUser = Depends(get_current_user),
 ):
-    request_user = await get_user_by_id(session, user_auth_data.id)
     permission = is_admin(request_user)
     if permission:
         category = await get_category_or_400(session, title_data.category)
         list_of_genres = await get_genres_or_400(session, title_data.genre)
-        new_title = await create_title(session, title_data, category.id, list_of_genres)
+        new_title = await create_title(session, title_data, category, list_of_genres)
 
-        title_out = TitleOut(
+        title_out = TitleOut.model_construct(
             name=new_title.name,
             year=new_title.year,
             rating=None,
             description=new_title.description,
-            genres=[
-                GenreBase(name=genre.name, slug=genre.slug)
-                for genre in new_title.genres
-            ],
-            category=CategoryBase(
-                name=new_title.category.name, slug=new_title.category.slug
-            ),
+            genres=[construct_from(GenreBase, genre) for genre in new_title.genres],
+            category=construct_from(CategoryBase, new_title.category),
         )
 
-        return JSONResponse(
-            content=title_out.model_dump(), status_code=status.HTTP_201_CREATED
-        )
+        return trusted_response(title_out, status.HTTP_201_CREATED)
 
 
 @titlesrouter.get("/", response_model=Page[TitleOut])
 async def get_all_titles(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     name: Optional[str] = Query(None),
+    search: Optional[str] = Query(None),
     genres: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
+    genre_slug: Optional[str] = Query(None),
+    category_slug: Optional[str] = Query(None),
     year: Optional[int] = Query(None),
+    params: Params = Depends(),
 ):
     searching_filters = {
         "name": name,
+        "search": search,
         "genres": genres,
         "category": category,
+        "genre_slug": genre_slug,
+        "category_slug": category_slug,
         "year": year,
     }
-    titles_with_scores = await get_titles_with_avg_score(session, searching_filters)
-    titles_out = [
-        TitleOut(
-            name=title.name,
-            year=title.year,
-            rating=avg_score,
-            description=title.description,
-            genres=[
-                GenreBase(name=genre.name, slug=genre.slug) for genre in title.genres
-            ],
-            category=CategoryBase(name=title.category.name, slug=title.category.slug),
-        )
-        for title, avg_score in titles_with_scores
-    ]
-
-    return paginate(titles_out)
+    cache_params = get_titles_cache_params(searching_filters, params)
+    cache_key = await titles_response_cache.get_key(cache_params)
+    cached_page = await titles_response_cache.get(cache_key)
+    if cached_page is not None:
+        return Response(content=cached_page, media_type="application/json")
+
+    limit, offset = get_limit_offset(params)
+    documents = await get_title_documents(session, searching_filters, limit, offset)
+    response = await create_json_page(
+        documents, params, lambda: count_titles(session, searching_filters)
+    )
+    await titles_response_cache.set(cache_key, response.body)
+    return response
 
 
 @titlesrouter.get("/{title_id}/", response_model=TitleOut)
 async def get_title(
+    request: Request,
+    response: Response,
     title_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    title, avg_score = await get_title_with_score_or_404(session, title_id)
-    title_out = TitleOut(
-        name=title.name,
-        year=title.year,
-        rating=avg_score,
-        description=title.description,
-        genres=[GenreBase(name=genre.name, slug=genre.slug) for genre in title.genres],
-        category=CategoryBase(name=title.category.name, slug=title.category.slug),
+    updated_at = await get_title_updated_at(session, title_id)
+    if not updated_at:
+        raise HTTPException(
+            detail="Title not found", status_code=status.HTTP_404_NOT_FOUND
+        )
+    etag = make_etag(title_id, updated_at.isoformat())
+    not_modified = conditional_response(request, response, etag, updated_at)
+    if not_modified:
+        return not_modified
+    document = await get_title_document_by_id(session, title_id)
+    if not document:
+        raise HTTPException(
+            detail="Title not found", status_code=status.HTTP_404_NOT_FOUND
+        )
+    return Response(
+        content=document, media_type="application/json", headers=response.headers
     )
 
-    return title_out
-
 
 @titlesrouter.patch("/{title_id}/", response_model=TitleOut)
 async def update_title(
     title_id: int,
     title_data: TitleCreate,
     session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    request_user: CurrentUser = Depends(get_current_user),
 ):
-    request_user = await get_user_by_id(session, user_auth_data.id)
     permission = is_admin(request_user)
     if permission:
         title_to_update, avg_score = await get_title_with_score_or_404(
@@ -163,33 +189,27 @@ async def update_title(
         category = await get_category_or_400(session, title_data.category)
         list_of_genres = await get_genres_or_400(session, title_data.genre)
         updated_title = await update_title_info(
-            session, title_to_update, title_data, category.id, list_of_genres
+            session, title_to_update, title_data, category, list_of_genres
         )
 
-        title_out = TitleOut(
+        title_out = TitleOut.model_construct(
             name=updated_title.name,
             year=updated_title.year,
             rating=avg_score,
             description=updated_title.description,
-            genres=[
-                GenreBase(name=genre.name, slug=genre.slug)
-                for genre in updated_title.genres
-            ],
-            category=CategoryBase(
-                name=updated_title.category.name, slug=updated_title.category.slug
-            ),
+            genres=[construct_from(GenreBase, genre) for genre in updated_title.genres],
+            category=construct_from(CategoryBase, updated_title.category),
         )
 
-        return title_out
+        return trusted_response(title_out)
 
 
 @titlesrouter.delete("/{title_id}/")
 async def delete_title_by_id(
     title_id: int,
     session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    request_user: CurrentUser = Depends(get_current_user),
 ):
-    request_user = await get_user_by_id(session, user_auth_data.id)
     permission = is_admin(request_user)
     if permission:
         title = await get_title_by_id(session, title_id)
@@ -199,6 +219,7 @@ async def delete_title_by_id(
             )
         deleted = await delete_title(session, title)
         if deleted:
+            purge_worker.notify()
             return Response(status_code=status.HTTP_204_NO_CONTENT)
         raise HTTPException(
             detail="Couldnt delete, try again later",
@@ -1,15 +1,19 @@
 from typing import Optional
 from fastapi import APIRouter, HTTPException, Response, Depends, Query, status
-from fastapi.responses import JSONResponse
-from fastapi_pagination import Page, add_pagination, paginate
+from fastapi_pagination import Page, Params, add_pagination
 from pydantic import EmailStr
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
+from api.pagination import create_db_page, get_limit_offset
+from api.responses import construct_from, trusted_response
+from crud.errors import is_unique_violation
 from models.user import User
-from schemas.user_schema import UserAuth, UserBase, UserDB
-from db.database import get_session
+from schemas.user_schema import CurrentUser, UserAuth, UserBase, UserDB
+from db.database import get_read_session, get_session
 from crud.user_repository import (
+    count_users,
     create_user,
     delete_user_from_db,
     get_user_by_id,
@@ -18,8 +22,9 @@ from crud.user_repository import (
     get_users,
     update_user_info,
 )
-from security.security import get_user_from_token
+from security.security import get_current_user, get_user_from_token
 from security.user_permissions import is_admin
+from utils.purge_worker import purge_worker
 
 
 usersrouter = APIRouter()
@@ -44,56 +49,72 @@ async def email_is_free(session: AsyncSession, email: EmailStr):
     return user_by_email
 
 
+async def get_token_user_or_401(session: AsyncSession, user_id: int) -> User:
+    # Токен переживает удаление: помеченный на удаление пользователь не найдётся
+    user = await get_user_by_id(session, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+def user_conflict_error(error: IntegrityError) -> HTTPException:
+    if is_unique_violation(error, "user.username"):
+        return HTTPException(
+            detail="Username already taken", status_code=status.HTTP_400_BAD_REQUEST
+        )
+    return HTTPException(
+        detail="Email already registered", status_code=status.HTTP_400_BAD_REQUEST
+    )
+
+
 @usersrouter.get("/", response_model=Page[UserDB])
 async def get_all_user(
-    session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    session: AsyncSession = Depends(get_read_session),
+    request_user: CurrentUser = Depends(get_current_user),
     filter_username: Optional[str] = Query(None),
+    params: Params = Depends(),
 ):
-    request_user = await get_user_by_id(session, user_auth_data.id)
     permission = is_admin(request_user)
     if permission:
-        users = await get_users(session, filter_username)
-        return paginate(users)
+        limit, offset = get_limit_offset(params)
+        users = await get_users(session, filter_username, limit, offset)
+        page = await create_db_page(
+            [construct_from(UserDB, user) for user in users],
+            params,
+            lambda: count_users(session, filter_username),
+        )
+        return trusted_response(page)
 
 
 @usersrouter.post("/", response_model=UserDB)
 async def create_new_user(
     new_user_data: UserBase,
     session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    request_user: CurrentUser = Depends(get_current_user),
 ):
-    request_user = await get_user_by_id(session, user_auth_data.id)
     permission = is_admin(request_user)
     if permission:
-        user_by_username = await get_user_by_username(session, new_user_data.username)
-        if user_by_username:
-            raise HTTPException(
-                detail="Username already taken", status_code=status.HTTP_400_BAD_REQUEST
-            )
-        user_by_email = await get_user_by_email(session, new_user_data.email)
-        if user_by_email:
-            raise HTTPException(
-                detail="Email already registered",
-                status_code=status.HTTP_400_BAD_REQUEST,
-            )
+        try:
+            new_user = await create_user(session, new_user_data)
+        except IntegrityError as error:
+            raise user_conflict_error(error)
+        user = construct_from(UserDB, new_user)
 
-        new_user = await create_user(session, new_user_data)
-        user = UserDB.model_validate(new_user)
-
-        return JSONResponse(
-            content=user.model_dump(), status_code=status.HTTP_201_CREATED
-        )
+        return trusted_response(user, status.HTTP_201_CREATED)
 
 
 @usersrouter.get("/me/", response_model=UserDB)
 async def get_myself(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     user_auth_data: UserAuth = Depends(get_user_from_token),
 ):
-    request_user = await get_user_by_id(session, user_auth_data.id)
-    user = UserDB.model_validate(request_user)
-    return user
+    request_user = await get_token_user_or_401(session, user_auth_data.id)
+    user = construct_from(UserDB, request_user)
+    return trusted_response(user)
 
 
 @usersrouter.patch("/me/", response_model=UserDB)
@@ -102,7 +123,7 @@ async def update_myself(
     session: AsyncSession = Depends(get_session),
     user_auth_data: UserAuth = Depends(get_user_from_token),
 ):
-    request_user = await get_user_by_id(session, user_auth_data.id)
+    request_user = await get_token_user_or_401(session, user_auth_data.id)
 
     user_by_username = await get_user_by_username(session, new_user_data.username)
     user_by_email = await get_user_by_email(session, new_user_data.email)
@@ -118,18 +139,20 @@ async def update_myself(
         )
 
     new_user_data.role = request_user.role
-    updated_user = await update_user_info(session, request_user, new_user_data)
-    user = UserDB.model_validate(updated_user)
-    return user
+    try:
+        updated_user = await update_user_info(session, request_user, new_user_data)
+    except IntegrityError as error:
+        raise user_conflict_error(error)
+    user = construct_from(UserDB, updated_user)
+    return trusted_response(user)
 
 
 @usersrouter.get("/{username}/", response_model=UserDB)
 async def get_user_for_admin(
     username: str,
-    session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    session: AsyncSession = Depends(get_read_session),
+    request_user: CurrentUser = Depends(get_current_user),
 ):
-    request_user = await get_user_by_id(session, user_auth_data.id)
     permission = is_admin(request_user)
     if permission:
         user_model = await get_user_by_username(session, username)
@@ -137,8 +160,8 @@ async def get_user_for_admin(
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
             )
-        user = UserDB.model_validate(user_model)
-        return user
+        user = construct_from(UserDB, user_model)
+        return trusted_response(user)
 
 
 @usersrouter.patch("/{username}/", response_model=UserDB)
@@ -146,9 +169,8 @@ async def update_user(
     username: str,
     new_user_data: UserBase,
     session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    request_user: CurrentUser = Depends(get_current_user),
 ):
-    request_user = await get_user_by_id(session, user_auth_data.id)
     permission = is_admin(request_user)
     if permission:
         user_to_update = await get_user_by_username(session, username)
@@ -170,18 +192,22 @@ async def update_user(
                 status_code=status.HTTP_400_BAD_REQUEST,
             )
 
-        updated_user = await update_user_info(session, request_user, new_user_data)
-        user = UserDB.model_validate(updated_user)
-        return user
+        try:
+            updated_user = await update_user_info(
+                session, user_to_update, new_user_data
+            )
+        except IntegrityError as error:
+            raise user_conflict_error(error)
+        user = construct_from(UserDB, updated_user)
+        return trusted_response(user)
 
 
 @usersrouter.delete("/{username}/")
 async def delete_user(
     username: str,
     session: AsyncSession = Depends(get_session),
-    user_auth_data: UserAuth = Depends(get_user_from_token),
+    request_user: CurrentUser = Depends(get_current_user),
 ):
-    request_user = await get_user_by_id(session, user_auth_data.id)
     permission = is_admin(request_user)
     if permission:
         user_to_delete = await get_user_by_username(session, username)
@@ -191,6 +217,7 @@ async def delete_user(
             )
         deleted = await delete_user_from_db(session, user_to_delete)
         if deleted:
+            purge_worker.notify()
             return Response(status_code=status.HTTP_204_NO_CONTENT)
         raise HTTPException(
             detail="Couldn't delete, try again later",
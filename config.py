@@ -1,3 +1,6 @@
+import os
+
+
 MAX_FIELD_LENGTH = 255
 MAX_USERNAME_LENGTH = 150
 MAX_EMAIL_LENGTH = 150
@@ -8,3 +11,65 @@ MIN_SLUG_LENGTH = 1
 SECRET_KEY = "hhz7l-ltdismtf@bzyz+rple7*s*w$jak%whj@(@u0eok^f9k4"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 120000
+
+USER_CACHE_MAX_SIZE = 10000
+USER_CACHE_TTL = 60
+
+REFERENCE_CACHE_MAX_SIZE = 1000
+REFERENCE_CACHE_TTL = 300
+
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")  # или "redis"
+RESPONSE_CACHE_MAX_SIZE = 1000
+RESPONSE_CACHE_TTL = 60
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+REDIS_DB = int(os.getenv("REDIS_DB", 0))
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
+
+# Сколько строк выгрузки читается из курсора и отправляется клиенту за раз
+EXPORT_CHUNK_SIZE = 1000
+# Строк в одном executemany при импорте; каждая пачка коммитится отдельно
+IMPORT_BATCH_SIZE = 500
+
+PWD_HASH_MAX_WORKERS = 4
+
+EMAIL_TRANSPORT = "file"  # "file" или "smtp"
+EMAIL_DIR = "sent_emails"
+EMAIL_FROM = "noreply@yamdb.local"
+SMTP_HOST = "localhost"
+SMTP_PORT = 1025
+SMTP_USERNAME = None
+SMTP_PASSWORD = None
+SMTP_USE_TLS = False
+
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_POLL_INTERVAL = 5
+OUTBOX_LEASE_SECONDS = 60
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY_SECONDS = 10
+
+# Удалённые произведения и пользователи вычищаются фоном небольшими пачками,
+# с паузой между ними, чтобы не держать блокировку записи SQLite подолгу
+PURGE_BATCH_SIZE = 500
+PURGE_BATCH_INTERVAL = 0.2
+PURGE_POLL_INTERVAL = 30
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///db.sqlite3")
+# URL реплики для чтения; если не задан, SQLite-база открывается второй раз в mode=ro
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+# Отдавать клиенту заголовок Server-Timing с числом SQL-запросов и временем в БД
+SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() == "true"
+
+# Применяются к каждому новому SQLite-соединению: WAL позволяет читателям
+# работать параллельно с писателем, busy_timeout ждёт блокировку вместо ошибки
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+    "busy_timeout": 5000,
+    "foreign_keys": "ON",
+}
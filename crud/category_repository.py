@@ -1,10 +1,14 @@
 from typing import Optional, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models.review import Category
+from crud.reference_cache import category_cache
+from crud.titles_repository import refresh_title_documents, touch_titles
+from models.review import Category, Title
 from schemas.review_schema import CategoryBase
+from utils.response_cache import titles_response_cache
 
 
 async def create_category(
@@ -12,8 +16,12 @@ async def create_category(
 ) -> Category:
     db_category = Category(**category_data.model_dump())
     session.add(db_category)
-    await session.commit()
-    await session.refresh(db_category)
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise
+    category_cache.clear()
     return db_category
 
 
@@ -23,17 +31,56 @@ async def get_category_by_slug(session: AsyncSession, slug: str) -> Optional[Cat
     return result.scalars().first()
 
 
-async def get_categories(
-    session: AsyncSession, name: Optional[str] = None
-) -> Sequence[Category]:
-    query = select(Category)
+def _categories_filters(name: Optional[str]) -> list:
+    filters = []
     if name:
-        query.where(Category.name.ilike(f"%{name}%"))
-    result = await session.execute(query)
-    return result.scalars().all()
+        filters.append(Category.name.ilike(f"%{name}%"))
+    return filters
+
+
+async def get_categories(
+    session: AsyncSession,
+    name: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+) -> Sequence[CategoryBase]:
+    key = ("page", name, limit, offset)
+    categories = category_cache.get(key)
+    if categories is None:
+        query = (
+            select(Category)
+            .where(*_categories_filters(name))
+            .order_by(Category.id)
+            .limit(limit)
+            .offset(offset)
+        )
+        result = await session.execute(query)
+        categories = tuple(
+            CategoryBase.model_validate(obj) for obj in result.scalars().all()
+        )
+        category_cache.set(key, categories)
+    return categories
+
+
+async def count_categories(session: AsyncSession, name: Optional[str] = None) -> int:
+    key = ("count", name)
+    total = category_cache.get(key)
+    if total is None:
+        query = select(func.count(Category.id)).where(*_categories_filters(name))
+        result = await session.execute(query)
+        total = result.scalar_one()
+        category_cache.set(key, total)
+    return total
 
 
 async def delete_category(session: AsyncSession, category_db: Category) -> bool:
+    query = select(Title.id).filter_by(category_id=category_db.id)
+    title_ids = (await session.execute(query)).scalars().all()
     await session.delete(category_db)
+    await session.flush()
+    await touch_titles(session, title_ids)
+    await refresh_title_documents(session, title_ids)
     await session.commit()
+    category_cache.clear()
+    await titles_response_cache.invalidate()
     return True
@@ -1,47 +1,148 @@
+from datetime import datetime
 from typing import Optional, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import String, and_, select, func, tuple_, type_coerce
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import selectinload
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
 
-from models.review import Comment
+from crud.reviews_repository import touch_reviews
+from crud.visibility import comment_author_is_visible, review_is_visible
+from models.review import Comment, Review
+from models.user import User
 from schemas.review_schema import CommentCreate
+from utils.single_flight import coalesce_reads
 
 
 async def create_comment(
     session: AsyncSession, comment_data: CommentCreate, author_id: int, review_id: int
-) -> Optional[Comment]:
+) -> Comment:
     db_comment = Comment(
         **comment_data.model_dump(), author_id=author_id, review_id=review_id
     )
     session.add(db_comment)
+    await touch_reviews(session, [review_id])
     await session.commit()
-    await session.refresh(db_comment)
+    return db_comment
+
 
+@coalesce_reads("comments_page")
+async def get_comments(
+    session: AsyncSession,
+    review_id: int,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+) -> Sequence[Comment]:
     query = (
         select(Comment)
-        .filter_by(id=db_comment.id)
+        .filter_by(review_id=review_id)
+        .where(comment_author_is_visible)
         .options(selectinload(Comment.author))
+        .order_by(Comment.id)
+        .limit(limit)
+        .offset(offset)
     )
     result = await session.execute(query)
-    return result.scalars().first()
+    return result.scalars().all()
 
 
-async def get_comments(session: AsyncSession, review_id: int) -> Sequence[Comment]:
+@coalesce_reads("comments_keyset")
+async def get_comments_keyset(
+    session: AsyncSession,
+    review_id: int,
+    limit: int,
+    after: Optional[tuple[str, int]] = None,
+) -> Sequence[Row[tuple[Comment, str]]]:
+    # pub_date сравнивается как хранимая строка, чтобы условие шло по индексу
+    pub_date_raw = type_coerce(Comment.pub_date, String)
     query = (
-        select(Comment)
-        .filter_by(review_id=review_id)
+        select(Comment, pub_date_raw.label("pub_date_raw"))
+        .where(Comment.review_id == review_id, comment_author_is_visible)
         .options(selectinload(Comment.author))
+        .order_by(Comment.pub_date.desc(), Comment.id.desc())
+        .limit(limit)
     )
+    if after:
+        query = query.where(tuple_(pub_date_raw, Comment.id) < tuple_(*after))
     result = await session.execute(query)
-    return result.scalars().all()
+    return result.all()
+
+
+async def stream_comments_export(
+    session: AsyncSession, chunk_size: int
+) -> AsyncResult:
+    query = (
+        select(
+            Comment.id,
+            Comment.review_id,
+            User.username.label("author"),
+            Comment.text,
+            Comment.pub_date,
+        )
+        .join(User, User.id == Comment.author_id)
+        .join(Review, Review.id == Comment.review_id)
+        .where(comment_author_is_visible, review_is_visible)
+        .order_by(Comment.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    return await session.stream(query)
+
+
+@coalesce_reads("comments_count")
+async def count_comments(session: AsyncSession, review_id: int) -> int:
+    query = (
+        select(func.count(Comment.id))
+        .filter_by(review_id=review_id)
+        .where(comment_author_is_visible)
+    )
+    result = await session.execute(query)
+    return result.scalar_one()
+
+
+@coalesce_reads("comments_validators")
+async def get_comments_validators(
+    session: AsyncSession, review_id: int
+) -> Optional[Row[tuple[Optional[datetime], int]]]:
+    # Одна выборка по индексу (review_id, updated_at); None — отзыва нет.
+    # Удаление комментария сдвигает Review.updated_at, он тоже входит в ответ
+    last_modified = func.max(
+        func.coalesce(func.max(Comment.updated_at), Review.updated_at),
+        Review.updated_at,
+    )
+    query = (
+        select(last_modified, func.count(Comment.id))
+        .select_from(Review)
+        .outerjoin(
+            Comment, and_(Comment.review_id == Review.id, comment_author_is_visible)
+        )
+        .where(Review.id == review_id, review_is_visible)
+        .group_by(Review.id)
+    )
+    result = await session.execute(query)
+    return result.first()
+
+
+@coalesce_reads("comment_updated_at")
+async def get_comment_updated_at(
+    session: AsyncSession, comment_id: int
+) -> Optional[datetime]:
+    query = (
+        select(Comment.updated_at)
+        .join(Review, Review.id == Comment.review_id)
+        .where(Comment.id == comment_id, comment_author_is_visible, review_is_visible)
+    )
+    result = await session.execute(query)
+    return result.scalar_one_or_none()
 
 
 async def get_comment_by_id(
     session: AsyncSession, comment_id: int
 ) -> Optional[Comment]:
     query = (
-        select(Comment).filter_by(id=comment_id).options(selectinload(Comment.author))
+        select(Comment)
+        .join(Review, Review.id == Comment.review_id)
+        .where(Comment.id == comment_id, comment_author_is_visible, review_is_visible)
+        .options(selectinload(Comment.author))
     )
     result = await session.execute(query)
     return result.scalars().first()
@@ -52,11 +153,11 @@ async def update_comment_info(
 ) -> Comment:
     comment_db.text = new_comment_data.text
     await session.commit()
-    await session.refresh(comment_db)
     return comment_db
 
 
 async def delete_comment(session: AsyncSession, comment_db: Comment) -> bool:
+    await touch_reviews(session, [comment_db.review_id])
     await session.delete(comment_db)
     await session.commit()
     return True
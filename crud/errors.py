@@ -0,0 +1,10 @@
+from sqlalchemy.exc import IntegrityError
+
+
+def is_unique_violation(error: IntegrityError, *columns: str) -> bool:
+    # SQLite: "UNIQUE constraint failed: user.username" (для составных ключей
+    # колонки перечисляются через запятую)
+    message = str(error.orig)
+    return "UNIQUE constraint failed" in message and all(
+        column in message for column in columns
+    )
@@ -1,17 +1,25 @@
 from typing import Optional, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models.review import Genre
+from crud.reference_cache import genre_cache
+from crud.titles_repository import refresh_title_documents, touch_titles
+from models.review import Genre, genre_title
 from schemas.review_schema import GenreBase
+from utils.response_cache import titles_response_cache
 
 
 async def create_genre(session: AsyncSession, category_data: GenreBase) -> Genre:
     db_category = Genre(**category_data.model_dump())
     session.add(db_category)
-    await session.commit()
-    await session.refresh(db_category)
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise
+    genre_cache.clear()
     return db_category
 
 
@@ -21,17 +29,61 @@ async def get_genre_by_slug(session: AsyncSession, slug: str) -> Optional[Genre]
     return result.scalars().first()
 
 
-async def get_genres(
-    session: AsyncSession, name: Optional[str] = None
-) -> Sequence[Genre]:
-    query = select(Genre)
-    if name:
-        query.where(Genre.name.ilike(f"%{name}%"))
+async def get_genres_by_slugs(session: AsyncSession, slugs: list[str]) -> list[Genre]:
+    # Тот же порядок по slug, что и в документах произведений
+    query = select(Genre).where(Genre.slug.in_(slugs)).order_by(Genre.slug)
     result = await session.execute(query)
-    return result.scalars().all()
+    return list(result.scalars().all())
+
+
+def _genres_filters(name: Optional[str]) -> list:
+    filters = []
+    if name:
+        filters.append(Genre.name.ilike(f"%{name}%"))
+    return filters
+
+
+async def get_genres(
+    session: AsyncSession,
+    name: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+) -> Sequence[GenreBase]:
+    key = ("page", name, limit, offset)
+    genres = genre_cache.get(key)
+    if genres is None:
+        query = (
+            select(Genre)
+            .where(*_genres_filters(name))
+            .order_by(Genre.id)
+            .limit(limit)
+            .offset(offset)
+        )
+        result = await session.execute(query)
+        genres = tuple(GenreBase.model_validate(obj) for obj in result.scalars().all())
+        genre_cache.set(key, genres)
+    return genres
+
+
+async def count_genres(session: AsyncSession, name: Optional[str] = None) -> int:
+    key = ("count", name)
+    total = genre_cache.get(key)
+    if total is None:
+        query = select(func.count(Genre.id)).where(*_genres_filters(name))
+        result = await session.execute(query)
+        total = result.scalar_one()
+        genre_cache.set(key, total)
+    return total
 
 
 async def delete_genre(session: AsyncSession, category_db: Genre) -> bool:
+    query = select(genre_title.c.title_id).filter_by(genre_id=category_db.id)
+    title_ids = (await session.execute(query)).scalars().all()
     await session.delete(category_db)
+    await session.flush()
+    await touch_titles(session, title_ids)
+    await refresh_title_documents(session, title_ids)
     await session.commit()
+    genre_cache.clear()
+    await titles_response_cache.invalidate()
     return True
@@ -0,0 +1,324 @@
+import time
+from datetime import datetime, timezone
+from typing import Any, Optional, Sequence
+
+from fastapi.exceptions import ValidationException
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Table, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud.reference_cache import category_cache, genre_cache
+from crud.titles_repository import recalculate_titles_rating
+from models.base import utcnow
+from models.review import Category, Comment, Genre, Review, Title, genre_title
+from models.user import User
+from schemas.import_schema import DatasetImport, ImportReport, TitleImport
+from schemas.review_schema import CategoryBase, CommentCreate, GenreBase, ReviewCreate
+from schemas.user_schema import UserBase
+from utils.import_formats import ImportDataError
+
+
+def _value(row: dict[str, Any], *keys: str, required: bool = True) -> Any:
+    # Первый из ключей, у которого есть значение: author_id или author и т.п.
+    for key in keys:
+        if row.get(key) is not None:
+            return row[key]
+    if required:
+        raise ImportDataError(f"Field '{keys[0]}' is required: {row}")
+    return None
+
+
+def _int(value: Any) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ImportDataError(f"Expected an integer, got {value!r}")
+
+
+def _datetime(value: Any) -> datetime:
+    if value is None:
+        return utcnow()
+    try:
+        moment = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ImportDataError(f"Expected an ISO 8601 date, got {value!r}")
+    if moment.tzinfo:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _validate(schema: type[BaseModel], number: int, **fields: Any) -> BaseModel:
+    # Те же схемы и валидаторы, что у POST-ручек: Core insert их не вызывает
+    try:
+        return schema(**fields)
+    except ValidationError as e:
+        errors = "; ".join(
+            f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+            for error in e.errors()
+        )
+    except ValidationException as e:
+        # Валидаторы схем бросают ValidationException с текстом вместо списка
+        errors = str(e.errors())
+    raise ImportDataError(f"Row {number} is invalid: {errors}")
+
+
+def _slugs(value: Any) -> list[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [slug.strip() for slug in value.split(",") if slug.strip()]
+    return list(value)
+
+
+class _Lookups:
+    # Словари slug/username -> id читаются из базы один раз за импорт
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self._maps: dict[Any, dict[str, int]] = {}
+
+    async def resolve(self, column: Any, value: Any) -> Optional[int]:
+        if value is None:
+            return None
+        if column not in self._maps:
+            id_column = column.class_.id
+            result = await self.session.execute(select(column, id_column))
+            self._maps[column] = dict(result.all())
+        try:
+            return self._maps[column][str(value)]
+        except KeyError:
+            raise ImportDataError(f"{column.class_.__name__} not found: {value}")
+
+    async def reference(
+        self,
+        row: dict[str, Any],
+        id_key: str,
+        name_key: str,
+        column: Any,
+        required: bool = True,
+    ) -> Optional[int]:
+        # id принимается только из колонки *_id; slug и username, даже
+        # состоящие из цифр, всегда ищутся в базе
+        if row.get(id_key) is not None:
+            return _int(row[id_key])
+        return await self.resolve(
+            column, _value(row, name_key, id_key, required=required)
+        )
+
+    def reset(self) -> None:
+        self._maps.clear()
+
+
+async def _users(rows: list[dict], lookups: _Lookups) -> list[dict]:
+    users = []
+    for number, row in enumerate(rows, 1):
+        user = _validate(
+            UserBase,
+            number,
+            username=_value(row, "username"),
+            email=_value(row, "email"),
+            first_name=row.get("first_name"),
+            last_name=row.get("last_name"),
+            bio=row.get("bio"),
+            **({"role": row["role"]} if row.get("role") else {}),
+        )
+        users.append({"id": _int(row.get("id")), **user.model_dump()})
+    return users
+
+
+def _reference(rows: list[dict], schema: type[BaseModel]) -> list[dict]:
+    return [
+        {
+            "id": _int(row.get("id")),
+            **_validate(
+                schema, number, name=_value(row, "name"), slug=_value(row, "slug")
+            ).model_dump(),
+        }
+        for number, row in enumerate(rows, 1)
+    ]
+
+
+async def _categories(rows: list[dict], lookups: _Lookups) -> list[dict]:
+    return _reference(rows, CategoryBase)
+
+
+async def _genres(rows: list[dict], lookups: _Lookups) -> list[dict]:
+    return _reference(rows, GenreBase)
+
+
+async def _titles(rows: list[dict], lookups: _Lookups) -> list[dict]:
+    titles = []
+    for number, row in enumerate(rows, 1):
+        title = _validate(
+            TitleImport,
+            number,
+            name=_value(row, "name"),
+            year=_value(row, "year"),
+            description=row.get("description"),
+        )
+        titles.append(
+            {
+                "id": _int(row.get("id")),
+                "name": title.name,
+                "year": title.year,
+                "description": title.description,
+                "category_id": await lookups.reference(
+                    row, "category_id", "category", Category.slug, required=False
+                ),
+            }
+        )
+    return titles
+
+
+async def _genre_title(rows: list[dict], lookups: _Lookups) -> list[dict]:
+    return [
+        {
+            "title_id": _int(_value(row, "title_id")),
+            "genre_id": await lookups.reference(row, "genre_id", "genre", Genre.slug),
+        }
+        for row in rows
+    ]
+
+
+async def _reviews(rows: list[dict], lookups: _Lookups) -> list[dict]:
+    return [
+        {
+            "id": _int(row.get("id")),
+            "title_id": _int(_value(row, "title_id")),
+            "author_id": await lookups.reference(
+                row, "author_id", "author", User.username
+            ),
+            **_validate(
+                ReviewCreate,
+                number,
+                text=_value(row, "text"),
+                score=_value(row, "score"),
+            ).model_dump(),
+            "pub_date": _datetime(row.get("pub_date")),
+        }
+        for number, row in enumerate(rows, 1)
+    ]
+
+
+async def _comments(rows: list[dict], lookups: _Lookups) -> list[dict]:
+    return [
+        {
+            "id": _int(row.get("id")),
+            "review_id": _int(_value(row, "review_id")),
+            "author_id": await lookups.reference(
+                row, "author_id", "author", User.username
+            ),
+            **_validate(CommentCreate, number, text=_value(row, "text")).model_dump(),
+            "pub_date": _datetime(row.get("pub_date")),
+        }
+        for number, row in enumerate(rows, 1)
+    ]
+
+
+DATASETS = {
+    "users": (User.__table__, _users),
+    "categories": (Category.__table__, _categories),
+    "genres": (Genre.__table__, _genres),
+    "titles": (Title.__table__, _titles),
+    "genre_title": (genre_title, _genre_title),
+    "reviews": (Review.__table__, _reviews),
+    "comments": (Comment.__table__, _comments),
+}
+
+
+async def _insert_batches(
+    session: AsyncSession,
+    table: Table,
+    rows: Sequence[dict],
+    batch_size: int,
+    title_ids: set[int],
+) -> list[int]:
+    # Каждая пачка — один executemany и своя транзакция; у genre_title нет id.
+    # В title_ids попадают произведения только уже закоммиченных пачек
+    returning = "id" in table.c
+    statement = insert(table)
+    if returning:
+        statement = statement.returning(table.c.id, sort_by_parameter_order=True)
+    inserted_ids = []
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start : start + batch_size]
+        try:
+            result = await session.execute(statement, batch)
+            batch_ids = result.scalars().all() if returning else []
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            raise
+        inserted_ids.extend(batch_ids)
+        if table is Title.__table__:
+            title_ids.update(batch_ids)
+        elif "title_id" in table.c:
+            title_ids.update(row["title_id"] for row in batch)
+    return inserted_ids
+
+
+async def import_datasets(
+    session: AsyncSession,
+    datasets: Sequence[tuple[str, list[dict[str, Any]]]],
+    batch_size: int,
+) -> ImportReport:
+    lookups = _Lookups(session)
+    report = []
+    # Рейтинги и документы пересчитываются только у затронутых произведений
+    title_ids: set[int] = set()
+    started = time.perf_counter()
+    try:
+        for dataset, rows in datasets:
+            dataset_started = time.perf_counter()
+            table, normalize = DATASETS[dataset]
+            values = await normalize(rows, lookups)
+            inserted_ids = await _insert_batches(
+                session, table, values, batch_size, title_ids
+            )
+            imported = len(values)
+            if dataset == "titles":
+                # Жанры, перечисленные прямо в произведении (формат POST /titles/)
+                links = [
+                    {"title_id": title_id, "genre": slug}
+                    for title_id, row in zip(inserted_ids, rows)
+                    for slug in _slugs(row.get("genre") or row.get("genres"))
+                ]
+                links = await _genre_title(links, lookups)
+                await _insert_batches(
+                    session, genre_title, links, batch_size, title_ids
+                )
+            lookups.reset()
+            seconds = time.perf_counter() - dataset_started
+            report.append(
+                DatasetImport(
+                    dataset=dataset,
+                    rows=imported,
+                    seconds=round(seconds, 3),
+                    rows_per_second=round(imported / seconds if seconds else 0, 1),
+                )
+            )
+    finally:
+        # Пачки до упавшей уже закоммичены: их справочники, рейтинги и документы
+        # обновляются и при ошибке, иначе хранимые агрегаты разойдутся с отзывами
+        imported_datasets = {dataset for dataset, _ in datasets}
+        if "categories" in imported_datasets:
+            category_cache.clear()
+        if "genres" in imported_datasets:
+            genre_cache.clear()
+        # Пересчёт рейтингов заодно пересобирает документы и сбрасывает кэш
+        # ответов; пачками, чтобы не упереться в лимит параметров SQLite
+        affected_ids = sorted(title_ids)
+        for start in range(0, len(affected_ids), batch_size):
+            batch_ids = affected_ids[start : start + batch_size]
+            await recalculate_titles_rating(session, batch_ids)
+
+    seconds = time.perf_counter() - started
+    total_rows = sum(item.rows for item in report)
+    return ImportReport(
+        datasets=report,
+        rows=total_rows,
+        seconds=round(seconds, 3),
+        rows_per_second=round(total_rows / seconds if seconds else 0, 1),
+    )
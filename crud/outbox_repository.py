@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+from typing import Sequence
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.outbox import OutboxEmail, OutboxStatus
+
+
+async def create_outbox_email(
+    session: AsyncSession, recipient: str, subject: str, body: str
+) -> OutboxEmail:
+    db_email = OutboxEmail(recipient=recipient, subject=subject, body=body)
+    session.add(db_email)
+    await session.commit()
+    return db_email
+
+
+async def claim_outbox_emails(
+    session: AsyncSession, limit: int, lease: timedelta
+) -> Sequence[OutboxEmail]:
+    # Письма "арендуются" сдвигом next_attempt_at: второй воркер их не возьмёт,
+    # а после падения процесса они снова станут доступны по истечении аренды
+    now = datetime.now()
+    due_ids = (
+        select(OutboxEmail.id)
+        .where(
+            OutboxEmail.status == OutboxStatus.PENDING,
+            OutboxEmail.next_attempt_at <= now,
+        )
+        .order_by(OutboxEmail.next_attempt_at)
+        .limit(limit)
+    )
+    query = (
+        update(OutboxEmail)
+        .where(OutboxEmail.id.in_(due_ids))
+        .values(next_attempt_at=now + lease)
+        .returning(OutboxEmail)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(query)
+    emails = result.scalars().all()
+    await session.commit()
+    return emails
+
+
+async def delete_sent_emails(session: AsyncSession, email_ids: list[int]) -> None:
+    if email_ids:
+        await session.execute(delete(OutboxEmail).where(OutboxEmail.id.in_(email_ids)))
+    await session.commit()
+
+
+async def reschedule_outbox_email(
+    session: AsyncSession,
+    db_email: OutboxEmail,
+    error: str,
+    retry_delay: timedelta,
+    max_attempts: int,
+) -> None:
+    db_email.attempts += 1
+    db_email.last_error = error
+    if db_email.attempts >= max_attempts:
+        db_email.status = OutboxStatus.FAILED
+    else:
+        db_email.next_attempt_at = datetime.now() + retry_delay * 2 ** (
+            db_email.attempts - 1
+        )
+    await session.commit()
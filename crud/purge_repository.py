@@ -0,0 +1,110 @@
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import Select, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.base import utcnow
+from models.purge import PurgeJob, PurgeStatus, PurgeTarget
+from models.review import Comment, Review, Title
+from models.user import User
+
+
+TARGET_MODELS = {PurgeTarget.TITLE: Title, PurgeTarget.USER: User}
+
+
+def _purge_steps(job: PurgeJob) -> list[tuple[Any, Select]]:
+    # Шаги от листьев к корню: пока у шага есть строки, он удаляет их пачками,
+    # поэтому каскад на последней строке-корне уже почти ничего не трогает
+    if job.target == PurgeTarget.TITLE:
+        title_reviews = Review.title_id == job.target_id
+        return [
+            (
+                Comment,
+                select(Comment.id)
+                .join(Review, Review.id == Comment.review_id)
+                .where(title_reviews),
+            ),
+            (Review, select(Review.id).where(title_reviews)),
+        ]
+    author_reviews = Review.author_id == job.target_id
+    return [
+        (Comment, select(Comment.id).where(Comment.author_id == job.target_id)),
+        (
+            Comment,
+            select(Comment.id)
+            .join(Review, Review.id == Comment.review_id)
+            .where(author_reviews),
+        ),
+        (Review, select(Review.id).where(author_reviews)),
+    ]
+
+
+async def get_next_purge_job(session: AsyncSession) -> Optional[PurgeJob]:
+    query = (
+        select(PurgeJob)
+        .filter_by(status=PurgeStatus.PENDING)
+        .order_by(PurgeJob.id)
+        .limit(1)
+    )
+    result = await session.execute(query)
+    return result.scalars().first()
+
+
+async def purge_batch(session: AsyncSession, job: PurgeJob, batch_size: int) -> int:
+    # Одна пачка — одна короткая транзакция вместе с обновлением прогресса
+    for model, ids in _purge_steps(job):
+        query = delete(model).where(model.id.in_(ids.limit(batch_size)))
+        result = await session.execute(query)
+        if result.rowcount:
+            job.deleted_rows += result.rowcount
+            job.batches += 1
+            await session.commit()
+            return result.rowcount
+
+    root = TARGET_MODELS[job.target]
+    query = delete(root).where(root.id == job.target_id, root.deleted_at.is_not(None))
+    result = await session.execute(query)
+    job.deleted_rows += result.rowcount
+    job.batches += 1
+    job.status = PurgeStatus.DONE
+    job.finished_at = utcnow()
+    job.last_error = None
+    await session.commit()
+    return result.rowcount
+
+
+async def record_purge_error(session: AsyncSession, job_id: int, error: str) -> None:
+    query = update(PurgeJob).where(PurgeJob.id == job_id).values(last_error=error)
+    await session.execute(query)
+    await session.commit()
+
+
+async def get_purge_jobs(
+    session: AsyncSession,
+    status: Optional[PurgeStatus] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+) -> Sequence[PurgeJob]:
+    query = select(PurgeJob).order_by(PurgeJob.id.desc()).limit(limit).offset(offset)
+    if status:
+        query = query.filter_by(status=status)
+    result = await session.execute(query)
+    return result.scalars().all()
+
+
+async def count_purge_jobs(
+    session: AsyncSession, status: Optional[PurgeStatus] = None
+) -> int:
+    query = select(func.count(PurgeJob.id))
+    if status:
+        query = query.filter_by(status=status)
+    result = await session.execute(query)
+    return result.scalar_one()
+
+
+async def get_purge_job_by_id(
+    session: AsyncSession, job_id: int
+) -> Optional[PurgeJob]:
+    query = select(PurgeJob).filter_by(id=job_id)
+    result = await session.execute(query)
+    return result.scalars().first()
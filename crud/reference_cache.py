@@ -0,0 +1,12 @@
+from config import REFERENCE_CACHE_MAX_SIZE, REFERENCE_CACHE_TTL
+from utils.cache import TTLCache
+
+
+# Списки категорий и жанров меняются только админом, поэтому страницы и счётчики
+# кэшируются в процессе и сбрасываются целиком при каждой записи
+category_cache = TTLCache(max_size=REFERENCE_CACHE_MAX_SIZE, ttl=REFERENCE_CACHE_TTL)
+genre_cache = TTLCache(max_size=REFERENCE_CACHE_MAX_SIZE, ttl=REFERENCE_CACHE_TTL)
+
+
+def get_reference_cache_stats() -> dict[str, dict[str, int]]:
+    return {"categories": category_cache.stats(), "genres": genre_cache.stats()}
@@ -1,67 +1,181 @@
-from typing import Optional, Sequence
+from datetime import datetime
+from typing import Optional, Sequence, Union
 
-from sqlalchemy import select
+from sqlalchemy import Select, String, and_, select, func, tuple_, type_coerce, update
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import selectinload
-from sqlalchemy.sql import exists
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from models.review import Review
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+
+from crud.titles_repository import change_title_rating
+from crud.visibility import hidden_user_ids, review_is_visible, title_is_visible
+from models.base import utcnow
+from models.review import Review, Title
+from models.user import User
 from schemas.review_schema import ReviewCreate
+from utils.response_cache import titles_response_cache
+from utils.single_flight import coalesce_reads
 
 
 async def create_review(
     session: AsyncSession, review_data: ReviewCreate, author_id: int, title_id: int
-) -> Optional[Review]:
+) -> Review:
     db_review = Review(
         **review_data.model_dump(), author_id=author_id, title_id=title_id
     )
     session.add(db_review)
-    await session.commit()
-    await session.refresh(db_review)
+    try:
+        await change_title_rating(session, title_id, db_review.score, 1)
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise
+    await titles_response_cache.invalidate()
+    return db_review
 
+
+@coalesce_reads("reviews_page")
+async def get_reviews(
+    session: AsyncSession,
+    title_id: int,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+) -> Sequence[Review]:
     query = (
-        select(Review).filter_by(id=db_review.id).options(selectinload(Review.author))
+        select(Review)
+        .filter_by(title_id=title_id)
+        .where(review_is_visible)
+        .options(selectinload(Review.author))
+        .order_by(Review.id)
+        .limit(limit)
+        .offset(offset)
     )
     result = await session.execute(query)
-    return result.scalars().first()
+    return result.scalars().all()
 
 
-async def review_exists(
-    session: AsyncSession, author_id: int, title_id: int
-) -> Optional[bool]:
-    subquery = select(
-        exists().where(Review.author_id == author_id, Review.title_id == title_id)
+@coalesce_reads("reviews_keyset")
+async def get_reviews_keyset(
+    session: AsyncSession,
+    title_id: int,
+    limit: int,
+    after: Optional[tuple[str, int]] = None,
+) -> Sequence[Row[tuple[Review, str]]]:
+    # pub_date сравнивается как хранимая строка, чтобы условие шло по индексу
+    pub_date_raw = type_coerce(Review.pub_date, String)
+    query = (
+        select(Review, pub_date_raw.label("pub_date_raw"))
+        .where(Review.title_id == title_id, review_is_visible)
+        .options(selectinload(Review.author))
+        .order_by(Review.pub_date.desc(), Review.id.desc())
+        .limit(limit)
     )
+    if after:
+        query = query.where(tuple_(pub_date_raw, Review.id) < tuple_(*after))
+    result = await session.execute(query)
+    return result.all()
 
-    result = await session.execute(subquery)
-    return result.scalar()
 
+async def stream_reviews_export(
+    session: AsyncSession, chunk_size: int
+) -> AsyncResult:
+    query = (
+        select(
+            Review.id,
+            Review.title_id,
+            User.username.label("author"),
+            Review.score,
+            Review.text,
+            Review.pub_date,
+        )
+        .join(User, User.id == Review.author_id)
+        .where(review_is_visible)
+        .order_by(Review.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    return await session.stream(query)
 
-async def get_reviews(session: AsyncSession, title_id: int) -> Sequence[Review]:
+
+@coalesce_reads("reviews_count")
+async def count_reviews(session: AsyncSession, title_id: int) -> int:
     query = (
-        select(Review).filter_by(title_id=title_id).options(selectinload(Review.author))
+        select(func.count(Review.id))
+        .filter_by(title_id=title_id)
+        .where(review_is_visible)
     )
     result = await session.execute(query)
-    return result.scalars().all()
+    return result.scalar_one()
+
+
+@coalesce_reads("reviews_validators")
+async def get_reviews_validators(
+    session: AsyncSession, title_id: int
+) -> Optional[Row[tuple[Optional[datetime], int]]]:
+    # Одна выборка по индексу (title_id, updated_at); None — произведения нет.
+    # Удаление отзыва не оставляет следа в отзывах, но сдвигает Title.updated_at
+    last_modified = func.max(
+        func.coalesce(func.max(Review.updated_at), Title.updated_at), Title.updated_at
+    )
+    query = (
+        select(last_modified, func.count(Review.id))
+        .select_from(Title)
+        .outerjoin(
+            Review,
+            and_(
+                Review.title_id == Title.id, Review.author_id.not_in(hidden_user_ids)
+            ),
+        )
+        .where(Title.id == title_id, title_is_visible)
+        .group_by(Title.id)
+    )
+    result = await session.execute(query)
+    return result.first()
+
+
+@coalesce_reads("review_updated_at")
+async def get_review_updated_at(
+    session: AsyncSession, review_id: int
+) -> Optional[datetime]:
+    query = select(Review.updated_at).filter_by(id=review_id).where(review_is_visible)
+    result = await session.execute(query)
+    return result.scalar_one_or_none()
 
 
 async def get_review_by_id(session: AsyncSession, review_id: int) -> Optional[Review]:
-    query = select(Review).filter_by(id=review_id).options(selectinload(Review.author))
+    query = (
+        select(Review)
+        .filter_by(id=review_id)
+        .where(review_is_visible)
+        .options(selectinload(Review.author))
+    )
     result = await session.execute(query)
     return result.scalars().first()
 
 
+async def touch_reviews(
+    session: AsyncSession, review_ids: Union[Sequence[int], Select]
+) -> None:
+    # Сдвигает Last-Modified списка комментариев, когда из него что-то пропало
+    query = update(Review).where(Review.id.in_(review_ids)).values(updated_at=utcnow())
+    await session.execute(query)
+
+
 async def update_review_info(
     session: AsyncSession, db_review: Review, new_review_data: ReviewCreate
 ) -> Review:
+    await change_title_rating(
+        session, db_review.title_id, new_review_data.score - db_review.score, 0
+    )
     db_review.text = new_review_data.text
     db_review.score = new_review_data.score
     await session.commit()
-    await session.refresh(db_review)
+    await titles_response_cache.invalidate()
     return db_review
 
 
 async def delete_review(session: AsyncSession, review_db: Review) -> bool:
+    await change_title_rating(session, review_db.title_id, -review_db.score, -1)
     await session.delete(review_db)
     await session.commit()
+    await titles_response_cache.invalidate()
     return True
@@ -1,56 +1,112 @@
-from typing import Union, Optional, Sequence, Any
+from datetime import datetime
+from typing import Iterable, Union, Optional, Sequence, Any
 
-from sqlalchemy import select, or_, extract
+from sqlalchemy import (
+    JSON,
+    Float,
+    Select,
+    and_,
+    case,
+    cast,
+    delete,
+    literal_column,
+    select,
+    or_,
+    text,
+    type_coerce,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.engine import Row
 from sqlalchemy.orm import selectinload
 from sqlalchemy.sql import func
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
 
-from models.review import Review, Title, Genre, Category
-from schemas.review_schema import TitleCreate
+from crud.visibility import hidden_user_ids, title_is_visible
+from models.base import utcnow
+from models.document import TitleDocument
+from models.purge import PurgeJob, PurgeTarget
+from models.review import Review, Title, Genre, Category, genre_title
+from models.search import TITLE_FTS_DDL, TITLE_FTS_REBUILD, title_fts
+from schemas.review_schema import CategoryBase, GenreBase, TitleCreate, TitleOut
+from utils.response_cache import titles_response_cache
+from utils.single_flight import coalesce_reads
+
+
+# Средняя оценка из хранимых в Title агрегатов, без обращения к таблице отзывов
+title_rating = case(
+    (Title.rating_count > 0, cast(Title.rating_sum, Float) / Title.rating_count),
+    else_=None,
+)
+
+# Жанры произведения по slug: у агрегатов SQLite нет своего ORDER BY,
+# порядок задаёт упорядоченный подзапрос, из которого они собираются
+ordered_title_genres = (
+    select(Genre.name, Genre.slug)
+    .join(genre_title, genre_title.c.genre_id == Genre.id)
+    .where(genre_title.c.title_id == Title.id)
+    .order_by(Genre.slug)
+    .correlate(Title)
+    .subquery()
+)
+
+# Жанры произведения одним JSON-массивом, собранным на стороне SQLite
+title_genres = type_coerce(
+    select(
+        func.json_group_array(
+            func.json_object(
+                "name", ordered_title_genres.c.name, "slug", ordered_title_genres.c.slug
+            )
+        )
+    ).scalar_subquery(),
+    JSON,
+)
 
 
 async def create_title(
     session: AsyncSession,
     title_data: TitleCreate,
-    category_id: int,
+    category: Category,
     genres: list[Genre],
-) -> Optional[Title]:
+) -> Title:
+    # Связи заполняются уже загруженными объектами, перечитывать title не нужно
     db_title = Title(
         name=title_data.name,
         year=title_data.year,
         description=title_data.description,
-        category_id=category_id,
+        category=category,
+        genres=genres,
     )
-    db_title.genres.extend(genres)
     session.add(db_title)
+    await session.flush()
+    await refresh_title_documents(session, [db_title.id])
     await session.commit()
-    await session.refresh(db_title)
+    await titles_response_cache.invalidate()
+    return db_title
 
-    query = (
-        select(Title)
-        .filter_by(name=db_title.name)
-        .options(selectinload(Title.genres), selectinload(Title.category))
-    )
+
+async def get_title_by_id(session: AsyncSession, title_id: int) -> Optional[Title]:
+    query = select(Title).filter_by(id=title_id).where(title_is_visible)
     result = await session.execute(query)
     return result.scalars().first()
 
 
-async def get_title_by_id(session: AsyncSession, title_id: int) -> Optional[Title]:
-    query = select(Title).filter_by(id=title_id)
+@coalesce_reads("title_updated_at")
+async def get_title_updated_at(
+    session: AsyncSession, title_id: int
+) -> Optional[datetime]:
+    query = select(Title.updated_at).filter_by(id=title_id).where(title_is_visible)
     result = await session.execute(query)
-    return result.scalars().first()
+    return result.scalar_one_or_none()
 
 
 async def get_title_by_id_with_avg_score(
     session: AsyncSession, title_id: int
 ) -> Row[tuple[Title, Any]]:
     query = (
-        select(Title, func.avg(Review.score).label("avg_score"))
-        .outerjoin(Review, Review.title_id == Title.id)
+        select(Title, title_rating.label("avg_score"))
         .options(selectinload(Title.genres), selectinload(Title.category))
-        .filter(Title.id == title_id)
-        .group_by(Title.id)
+        .filter(Title.id == title_id, title_is_visible)
     )
     result = await session.execute(query)
     title_with_avg_score = result.first()
@@ -59,19 +115,27 @@ async def get_title_by_id_with_avg_score(
     return None
 
 
-async def get_titles_with_avg_score(
-    session: AsyncSession, searching_filters: dict[str, Union[str, int, None]]
-) -> Sequence[Row[tuple[Title, Any]]]:
-    query = (
-        select(Title, func.avg(Review.score).label("avg_score"))
-        .outerjoin(Review, Review.title_id == Title.id)
-        .options(selectinload(Title.genres), selectinload(Title.category))
-        .group_by(Title.id)
+def _fts_query(search: str) -> str:
+    # Каждое слово берётся в кавычки, чтобы ввод не разбирался как синтаксис FTS5
+    words = search.split()
+    return " ".join('"{}"'.format(word.replace('"', '""')) for word in words)
+
+
+def _apply_search(query: Select, search: Optional[str]) -> Select:
+    if not search or not search.split():
+        return query
+    return query.join(title_fts, title_fts.c.rowid == Title.id).where(
+        literal_column("title_fts").match(_fts_query(search))
     )
-    filters = []
+
+
+def _titles_filters(searching_filters: dict[str, Union[str, int, None]]) -> list:
+    filters = [title_is_visible]
     name = searching_filters.get("name")
     genres = searching_filters.get("genres")
     category = searching_filters.get("category")
+    genre_slug = searching_filters.get("genre_slug")
+    category_slug = searching_filters.get("category_slug")
     year = searching_filters.get("year")
     if name:
         filters.append(Title.name.ilike(f"%{name}%"))
@@ -80,12 +144,176 @@ async def get_titles_with_avg_score(
         filters.append(or_(*[Title.genres.any(filter) for filter in genre_filters]))
     if category:
         filters.append(Title.category.has(Category.name.like(f"%{category}%")))
+    # Точные фильтры по slug: подзапросы не коррелированы и считаются один раз,
+    # дальше отбор идёт по индексам genre_title и title.category_id
+    if genre_slug:
+        title_ids = (
+            select(genre_title.c.title_id)
+            .join(Genre, Genre.id == genre_title.c.genre_id)
+            .where(Genre.slug.in_(genre_slug.split(",")))
+        )
+        filters.append(Title.id.in_(title_ids))
+    if category_slug:
+        category_id = select(Category.id).filter_by(slug=category_slug)
+        filters.append(Title.category_id == category_id.scalar_subquery())
     if year:
         filters.append(Title.year == year)
-    if filters:
-        query = query.where(*filters)
+    return filters
+
+
+def _title_rows_query() -> Select:
+    return (
+        select(
+            Title.id,
+            Title.name,
+            Title.year,
+            Title.description,
+            title_rating.label("rating"),
+            Category.name.label("category_name"),
+            Category.slug.label("category_slug"),
+            title_genres.label("genres"),
+        )
+        .select_from(Title)
+        .outerjoin(Category, Category.id == Title.category_id)
+        .where(title_is_visible)
+    )
+
+
+def _title_row_to_document(row: Row) -> str:
+    category = None
+    if row.category_slug is not None:
+        category = CategoryBase(name=row.category_name, slug=row.category_slug)
+    title_out = TitleOut(
+        name=row.name,
+        year=row.year,
+        rating=row.rating,
+        description=row.description,
+        genres=[GenreBase(**genre) for genre in row.genres],
+        category=category,
+    )
+    return title_out.model_dump_json()
+
+
+async def refresh_title_documents(
+    session: AsyncSession, title_ids: Optional[Iterable[int]] = None
+) -> None:
+    # Пересобирает документы в текущей транзакции; без title_ids — все сразу
+    query = _title_rows_query()
+    if title_ids is not None:
+        title_ids = list(title_ids)
+        if not title_ids:
+            return
+        query = query.where(Title.id.in_(title_ids))
     result = await session.execute(query)
-    return result.all()
+    documents = [
+        {"title_id": row.id, "document": _title_row_to_document(row)}
+        for row in result.all()
+    ]
+    if not documents:
+        return
+    upsert = sqlite_insert(TitleDocument).values(documents)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[TitleDocument.title_id],
+        set_={"document": upsert.excluded.document},
+    )
+    await session.execute(upsert)
+
+
+async def rebuild_title_documents(session: AsyncSession) -> None:
+    await session.execute(delete(TitleDocument))
+    await refresh_title_documents(session)
+    await session.commit()
+    await titles_response_cache.invalidate()
+
+
+async def _fill_missing_documents(
+    session: AsyncSession, rows: Sequence[Row[tuple[int, Optional[str]]]]
+) -> list[str]:
+    # В базе, созданной до title_document, документов может не быть: такие
+    # собираются на лету тем же запросом, что и при записи
+    missing_ids = [title_id for title_id, document in rows if document is None]
+    built = {}
+    if missing_ids:
+        result = await session.execute(
+            _title_rows_query().where(Title.id.in_(missing_ids))
+        )
+        built = {row.id: _title_row_to_document(row) for row in result.all()}
+    return [
+        document if document is not None else built[title_id]
+        for title_id, document in rows
+    ]
+
+
+def _title_documents_query() -> Select:
+    return (
+        select(Title.id, TitleDocument.document)
+        .select_from(Title)
+        .outerjoin(TitleDocument, TitleDocument.title_id == Title.id)
+    )
+
+
+@coalesce_reads("title_document")
+async def get_title_document_by_id(
+    session: AsyncSession, title_id: int
+) -> Optional[str]:
+    query = _title_documents_query().where(Title.id == title_id, title_is_visible)
+    result = await session.execute(query)
+    rows = result.all()
+    if not rows:
+        return None
+    return (await _fill_missing_documents(session, rows))[0]
+
+
+async def get_title_documents(
+    session: AsyncSession,
+    searching_filters: dict[str, Union[str, int, None]],
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+) -> Sequence[str]:
+    query = (
+        _title_documents_query()
+        .where(*_titles_filters(searching_filters))
+        .limit(limit)
+        .offset(offset)
+    )
+    search = searching_filters.get("search")
+    query = _apply_search(query, search)
+    if search and search.split():
+        query = query.order_by(func.bm25(literal_column("title_fts")), Title.id)
+    else:
+        query = query.order_by(Title.id)
+    result = await session.execute(query)
+    return await _fill_missing_documents(session, result.all())
+
+
+async def stream_titles_export(session: AsyncSession, chunk_size: int) -> AsyncResult:
+    query = (
+        select(
+            Title.id,
+            Title.name,
+            Title.year,
+            Title.description,
+            title_rating.label("rating"),
+            Category.slug.label("category"),
+            select(func.group_concat(ordered_title_genres.c.slug, ","))
+            .scalar_subquery()
+            .label("genres"),
+        )
+        .outerjoin(Category, Category.id == Title.category_id)
+        .where(title_is_visible)
+        .order_by(Title.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    return await session.stream(query)
+
+
+async def count_titles(
+    session: AsyncSession, searching_filters: dict[str, Union[str, int, None]]
+) -> int:
+    query = select(func.count(Title.id)).where(*_titles_filters(searching_filters))
+    query = _apply_search(query, searching_filters.get("search"))
+    result = await session.execute(query)
+    return result.scalar_one()
 
 
 """
@@ -116,26 +344,110 @@ async def update_title_info(
     session: AsyncSession,
     db_title: Title,
     new_title_data: TitleCreate,
-    new_category_id: int,
+    new_category: Category,
     new_genres: list[Genre],
-) -> Optional[Title]:
+) -> Title:
     db_title.name = new_title_data.name
     db_title.year = new_title_data.year
     db_title.description = new_title_data.description
-    db_title.category_id = new_category_id
+    db_title.category = new_category
     db_title.genres = new_genres
+    # Смена одних жанров не трогает колонки title, поэтому отметка ставится явно
+    db_title.updated_at = utcnow()
+    await session.flush()
+    await refresh_title_documents(session, [db_title.id])
     await session.commit()
+    await titles_response_cache.invalidate()
+    return db_title
+
 
+async def delete_title(session: AsyncSession, title_db: Title) -> bool:
+    # Отзывы и комментарии большого произведения удаляются фоном пачками,
+    # здесь произведение только помечается и сразу пропадает из выдачи
+    title_db.deleted_at = utcnow()
+    await session.execute(delete(TitleDocument).filter_by(title_id=title_db.id))
+    session.add(PurgeJob(target=PurgeTarget.TITLE, target_id=title_db.id))
+    await session.commit()
+    await titles_response_cache.invalidate()
+    return True
+
+
+async def change_title_rating(
+    session: AsyncSession, title_id: int, score_delta: int, count_delta: int
+) -> None:
     query = (
-        select(Title)
-        .filter_by(id=db_title.id)
-        .options(selectinload(Title.genres), selectinload(Title.category))
+        update(Title)
+        .where(Title.id == title_id)
+        .values(
+            rating_sum=Title.rating_sum + score_delta,
+            rating_count=Title.rating_count + count_delta,
+            updated_at=utcnow(),
+        )
+    )
+    await session.execute(query)
+    await refresh_title_documents(session, [title_id])
+
+
+async def touch_titles(session: AsyncSession, title_ids: Sequence[int]) -> None:
+    if not title_ids:
+        return
+    query = update(Title).where(Title.id.in_(title_ids)).values(updated_at=utcnow())
+    await session.execute(query)
+
+
+async def remove_author_ratings(session: AsyncSession, author_id: int) -> None:
+    author_reviews = (Review.author_id == author_id, Review.title_id == Title.id)
+    query = (
+        update(Title)
+        .where(Title.id.in_(select(Review.title_id).filter_by(author_id=author_id)))
+        .values(
+            rating_sum=Title.rating_sum
+            - select(func.sum(Review.score)).where(*author_reviews).scalar_subquery(),
+            rating_count=Title.rating_count
+            - select(func.count(Review.id)).where(*author_reviews).scalar_subquery(),
+            updated_at=utcnow(),
+        )
+        .returning(Title.id)
+        .execution_options(synchronize_session="fetch")
     )
     result = await session.execute(query)
-    return result.scalars().first()
+    await refresh_title_documents(session, result.scalars().all())
 
 
-async def delete_title(session: AsyncSession, title_db: Title) -> bool:
-    await session.delete(title_db)
+async def recalculate_titles_rating(
+    session: AsyncSession, title_ids: Optional[Iterable[int]] = None
+) -> None:
+    # Без title_ids пересчитывается весь каталог. Отзывы удалённых, но ещё
+    # не вычищенных пользователей в рейтинг не входят
+    by_title = and_(
+        Review.title_id == Title.id, Review.author_id.not_in(hidden_user_ids)
+    )
+    query = (
+        update(Title)
+        .values(
+            rating_sum=select(func.coalesce(func.sum(Review.score), 0))
+            .where(by_title)
+            .scalar_subquery(),
+            rating_count=select(func.count(Review.id))
+            .where(by_title)
+            .scalar_subquery(),
+            updated_at=utcnow(),
+        )
+        .execution_options(synchronize_session="fetch")
+    )
+    if title_ids is not None:
+        title_ids = list(title_ids)
+        if not title_ids:
+            return
+        query = query.where(Title.id.in_(title_ids))
+    await session.execute(query)
+    await refresh_title_documents(session, title_ids)
+    await session.commit()
+    await titles_response_cache.invalidate()
+
+
+async def rebuild_titles_search_index(session: AsyncSession) -> None:
+    for statement in TITLE_FTS_DDL:
+        await session.execute(text(statement))
+    await session.execute(text(TITLE_FTS_REBUILD))
     await session.commit()
-    return True
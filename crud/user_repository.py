@@ -1,10 +1,19 @@
 from typing import Optional, Union, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import select, func, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from crud.reviews_repository import touch_reviews
+from crud.titles_repository import remove_author_ratings
+from crud.visibility import user_is_visible
+from models.base import utcnow
+from models.purge import PurgeJob, PurgeTarget
+from models.review import Comment, Review
 from models.user import User
 from schemas.user_schema import UserCreate, UserBase
+from security.user_cache import user_cache
+from utils.response_cache import titles_response_cache
 
 
 async def create_user(
@@ -14,42 +23,72 @@ async def create_user(
 ) -> User:
     db_user = User(**user_data.model_dump(), confirmation_code=code)
     session.add(db_user)
-    await session.commit()
-    await session.refresh(db_user)
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise
     return db_user
 
 
 async def get_user_by_id(session: AsyncSession, id: int) -> Optional[User]:
-    query = select(User).filter_by(id=id)
+    query = select(User).filter_by(id=id).where(user_is_visible)
     result = await session.execute(query)
     return result.scalars().first()
 
 
 async def get_user_by_username(session: AsyncSession, username: str) -> Optional[User]:
-    query = select(User).filter_by(username=username)
+    query = select(User).filter_by(username=username).where(user_is_visible)
     result = await session.execute(query)
     return result.scalars().first()
 
 
 async def get_user_by_email(session: AsyncSession, email: str) -> Optional[User]:
-    query = select(User).filter_by(email=email)
+    query = select(User).filter_by(email=email).where(user_is_visible)
     result = await session.execute(query)
     return result.scalars().first()
 
 
+def _users_filters(username: Optional[str]) -> list:
+    filters = [user_is_visible]
+    if username:
+        filters.append(User.username.ilike(f"%{username}%"))
+    return filters
+
+
 async def get_users(
-    session: AsyncSession, username: Optional[str] = None
+    session: AsyncSession,
+    username: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
 ) -> Sequence[User]:
-    query = select(User)
-    if username:
-        query.where(User.username.ilike(f"%{username}%"))
+    query = (
+        select(User)
+        .where(*_users_filters(username))
+        .order_by(User.id)
+        .limit(limit)
+        .offset(offset)
+    )
     result = await session.execute(query)
     return result.scalars().all()
 
 
+async def count_users(session: AsyncSession, username: Optional[str] = None) -> int:
+    query = select(func.count(User.id)).where(*_users_filters(username))
+    result = await session.execute(query)
+    return result.scalar_one()
+
+
 async def update_user_info(
     session: AsyncSession, db_user: User, new_user_data: UserBase
 ) -> User:
+    if new_user_data.username != db_user.username:
+        # Имя автора входит в ответы с отзывами и комментариями, а их ETag
+        # и Last-Modified строятся по updated_at: сдвигаем его у всех записей
+        now = utcnow()
+        for model in (Review, Comment):
+            query = update(model).where(model.author_id == db_user.id)
+            await session.execute(query.values(updated_at=now))
     db_user.username = new_user_data.username
     db_user.email = new_user_data.email
     db_user.first_name = new_user_data.first_name
@@ -57,8 +96,14 @@ async def update_user_info(
     db_user.bio = new_user_data.bio
     db_user.role = new_user_data.role
 
-    await session.commit()
-    await session.refresh(db_user)
+    # Удалённые, но ещё не вычищенные пользователи не видны проверкам ручки,
+    # а их имя и почта по-прежнему заняты
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise
+    user_cache.delete(db_user.id)
     return db_user
 
 
@@ -67,10 +112,19 @@ async def update_confirmation_code(
 ) -> None:
     db_user.confirmation_code = hashed_code
     await session.commit()
-    await session.refresh(db_user)
 
 
 async def delete_user_from_db(session: AsyncSession, db_user: User) -> bool:
-    await session.delete(db_user)
+    # Рейтинги пересчитываются сразу, а отзывы и комментарии вычищаются фоном;
+    # username и email остаются занятыми, пока строка пользователя не удалена
+    await remove_author_ratings(session, db_user.id)
+    # Комментарии автора пропадают из чужих отзывов: сдвигаем их Last-Modified
+    await touch_reviews(
+        session, select(Comment.review_id).filter_by(author_id=db_user.id)
+    )
+    db_user.deleted_at = utcnow()
+    session.add(PurgeJob(target=PurgeTarget.USER, target_id=db_user.id))
     await session.commit()
+    user_cache.delete(db_user.id)
+    await titles_response_cache.invalidate()
     return True
@@ -0,0 +1,22 @@
+from sqlalchemy import and_, select
+
+from models.review import Comment, Review, Title
+from models.user import User
+
+
+# Помеченные на удаление произведения и пользователи скрыты от чтения сразу,
+# а сами строки вместе с отзывами и комментариями позже вычищает PurgeWorker
+title_is_visible = Title.deleted_at.is_(None)
+user_is_visible = User.deleted_at.is_(None)
+
+# Подзапросы не коррелированы: SQLite один раз выбирает по индексу deleted_at
+# немногие ожидающие очистки id, а не проверяет каждую строку отдельно
+hidden_title_ids = select(Title.id).where(Title.deleted_at.is_not(None))
+hidden_user_ids = select(User.id).where(User.deleted_at.is_not(None))
+
+review_is_visible = and_(
+    Review.title_id.not_in(hidden_title_ids),
+    Review.author_id.not_in(hidden_user_ids),
+)
+# Видимость самого отзыва проверяют ручки комментариев до выборки списка
+comment_author_is_visible = Comment.author_id.not_in(hidden_user_ids)
@@ -1,23 +1,115 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+import config
 import models
+from db.query_stats import after_cursor_execute, before_cursor_execute, handle_error
+from db.schema_upgrade import get_schema_changes
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for pragma, value in config.SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
+def set_sqlite_read_only_pragmas(dbapi_connection, connection_record) -> None:
+    # journal_mode хранится в самом файле базы и на read-only соединении не меняется
+    cursor = dbapi_connection.cursor()
+    for pragma, value in config.SQLITE_PRAGMAS.items():
+        if pragma != "journal_mode":
+            cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+def is_sqlite_file(db_url: URL) -> bool:
+    return db_url.get_backend_name() == "sqlite" and db_url.database not in (
+        None,
+        "",
+        ":memory:",
+    )
+
 
+def get_read_only_url(url: str) -> URL:
+    db_url = make_url(url)
+    if is_sqlite_file(db_url) and not db_url.database.startswith("file:"):
+        return db_url.set(
+            database=f"file:{db_url.database}",
+            query={**db_url.query, "mode": "ro", "uri": "true"},
+        )
+    return db_url
 
-DB_NAME = "db.sqlite3"
 
+def create_engine(
+    url: str = config.DATABASE_URL,
+    echo: bool = config.DB_ECHO,
+    pool_size: Optional[int] = config.DB_POOL_SIZE,
+    max_overflow: Optional[int] = config.DB_MAX_OVERFLOW,
+    read_only: bool = False,
+    **kwargs: Any,
+) -> AsyncEngine:
+    db_url = make_url(url)
+    is_sqlite = db_url.get_backend_name() == "sqlite"
+    # In-memory SQLite работает на StaticPool, у которого нет размеров пула,
+    # а для файловой базы aiosqlite по умолчанию вообще не держит соединения
+    if not is_sqlite or is_sqlite_file(db_url):
+        kwargs.setdefault("poolclass", AsyncAdaptedQueuePool)
+        kwargs.setdefault("pool_size", pool_size)
+        kwargs.setdefault("max_overflow", max_overflow)
+    engine = create_async_engine(db_url, echo=echo, **kwargs)
+    # Число запросов и время в БД на каждый HTTP-запрос (заголовок Server-Timing)
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", handle_error)
+    if is_sqlite:
+        pragmas = set_sqlite_read_only_pragmas if read_only else set_sqlite_pragmas
+        event.listen(engine.sync_engine, "connect", pragmas)
+    return engine
 
-async_engine = create_async_engine(f"sqlite+aiosqlite:///{DB_NAME}", echo=True)
+
+def create_read_engine() -> AsyncEngine:
+    if config.DATABASE_READ_URL:
+        return create_engine(config.DATABASE_READ_URL, read_only=True)
+    if is_sqlite_file(make_url(config.DATABASE_URL)):
+        return create_engine(get_read_only_url(config.DATABASE_URL), read_only=True)
+    # In-memory база или СУБД без реплики: читаем через основной движок
+    return async_engine
+
+
+async_engine = create_engine()
 async_session = sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 
+read_engine = create_read_engine()
+async_read_session = sessionmaker(
+    read_engine, class_=AsyncSession, expire_on_commit=False
+)
+
 
 async def init_models():
     async with async_engine.begin() as conn:
-        existing_tables = await conn.run_sync(models.Base.metadata.reflect)
-        if not existing_tables:
-            await conn.run_sync(models.Base.metadata.create_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+        # Существующие таблицы create_all не меняет: новые колонки, ключи
+        # и индексы в старую базу добавляет manage.py upgrade_schema
+        changes = await conn.run_sync(get_schema_changes)
+    if changes:
+        raise RuntimeError(
+            f"Database schema is outdated ({'; '.join(changes)}). "
+            "Run: python manage.py upgrade_schema"
+        )
 
 
 async def get_session() -> AsyncSession:
     async with async_session() as session:
         yield session
+
+
+async def get_read_session() -> AsyncSession:
+    async with async_read_session() as session:
+        yield session
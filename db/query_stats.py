@@ -0,0 +1,82 @@
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Optional
+
+
+class RequestQueries:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Счётчик текущего запроса. Middleware кладёт сюда изменяемый объект: ручка
+# работает в дочерней задаче с копией контекста, но объект у них общий
+request_queries: ContextVar[Optional[RequestQueries]] = ContextVar(
+    "request_queries", default=None
+)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _record_query(conn) -> None:
+    started = conn.info["query_started"].pop()
+    queries = request_queries.get()
+    if queries is not None:
+        queries.count += 1
+        queries.seconds += time.perf_counter() - started
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_query(conn)
+
+
+def handle_error(exception_context) -> None:
+    # Упавший запрос не доходит до after_cursor_execute, но в базу он ходил
+    # (например, нарушение уникальности) и тоже учитывается
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        _record_query(connection)
+
+
+class RouteQueryStats:
+    # Сводка по шаблону маршрута ("GET /titles/{title_id}/"), а не по URL,
+    # чтобы разные id не раздували словарь
+    def __init__(self):
+        self._stats: defaultdict[str, dict[str, Any]] = defaultdict(
+            lambda: {"requests": 0, "queries": 0, "max_queries": 0, "db_ms": 0.0}
+        )
+
+    def record(self, route: str, queries: RequestQueries) -> None:
+        stats = self._stats[route]
+        stats["requests"] += 1
+        stats["queries"] += queries.count
+        stats["max_queries"] = max(stats["max_queries"], queries.count)
+        stats["db_ms"] += queries.seconds * 1000
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {
+            route: {
+                **values,
+                "avg_queries": round(values["queries"] / values["requests"], 2),
+                "avg_db_ms": round(values["db_ms"] / values["requests"], 3),
+                "db_ms": round(values["db_ms"], 3),
+            }
+            for route, values in self._stats.items()
+        }
+
+
+route_query_stats = RouteQueryStats()
+
+
+def server_timing(queries: RequestQueries, total_seconds: float) -> str:
+    return (
+        f'db;dur={queries.seconds * 1000:.3f};desc="{queries.count} queries", '
+        f"app;dur={total_seconds * 1000:.3f}"
+    )
+
+
+def get_route_query_stats() -> dict[str, dict[str, Any]]:
+    return route_query_stats.stats()
@@ -0,0 +1,182 @@
+from typing import Any
+
+from sqlalchemy import Connection, Table, UniqueConstraint, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine.reflection import Inspector
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.schema import CreateTable
+
+import models
+from models.search import TITLE_FTS_DDL, TITLE_FTS_REBUILD
+
+
+class SchemaUpgradeError(Exception):
+    pass
+
+
+def _needs_rebuild(inspector: Inspector, table: Table) -> list[str]:
+    # Новые колонки, внешние ключи и ограничения SQLite меняет только
+    # пересозданием таблицы, create_all существующую таблицу не трогает
+    changes = []
+    columns = {column["name"] for column in inspector.get_columns(table.name)}
+    for column in table.columns:
+        if column.name not in columns:
+            changes.append(f"add column {table.name}.{column.name}")
+
+    foreign_keys = {
+        (
+            tuple(fk["constrained_columns"]),
+            fk["referred_table"],
+            (fk["options"].get("ondelete") or "").upper(),
+        )
+        for fk in inspector.get_foreign_keys(table.name)
+    }
+    for fk in table.foreign_key_constraints:
+        key = (
+            tuple(fk.column_keys),
+            fk.referred_table.name,
+            (fk.ondelete or "").upper(),
+        )
+        if key not in foreign_keys:
+            changes.append(f"update foreign key {table.name}({', '.join(key[0])})")
+
+    uniques = {
+        tuple(unique["column_names"])
+        for unique in inspector.get_unique_constraints(table.name)
+    }
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            column_names = tuple(column.name for column in constraint.columns)
+            if column_names not in uniques:
+                changes.append(
+                    f"add unique constraint {table.name}({', '.join(column_names)})"
+                )
+    return changes
+
+
+def _outdated_indexes(inspector: Inspector, table: Table) -> list[Any]:
+    existing = {
+        index["name"]: bool(index["unique"])
+        for index in inspector.get_indexes(table.name)
+    }
+    return [
+        index
+        for index in table.indexes
+        if existing.get(index.name) != bool(index.unique)
+    ]
+
+
+def get_schema_changes(conn: Connection) -> list[str]:
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    changes = []
+    for table in models.Base.metadata.sorted_tables:
+        if table.name not in tables:
+            changes.append(f"create table {table.name}")
+            continue
+        changes.extend(_needs_rebuild(inspector, table))
+        changes.extend(
+            f"create index {index.name}"
+            for index in _outdated_indexes(inspector, table)
+        )
+    return changes
+
+
+def _fill_value(conn: Connection, column: Any) -> tuple[str, Any]:
+    # Значение для новой колонки у уже существующих строк: как при INSERT
+    if column.server_default is not None:
+        return f":{column.name}", str(column.server_default.arg)
+    default = column.default
+    if default is None:
+        return f":{column.name}", None
+    if default.is_scalar:
+        return f":{column.name}", default.arg
+    if default.is_callable:
+        return f":{column.name}", default.arg(None)
+    return str(default.arg.compile(dialect=conn.dialect)), None
+
+
+def _rebuild_table(conn: Connection, table: Table) -> None:
+    # Порядок из документации SQLite: новая таблица, копия строк, удаление
+    # старой и переименование новой; внешние ключи на это время выключены
+    preparer = conn.dialect.identifier_preparer
+    old_name = preparer.format_table(table)
+    new_name = preparer.quote(f"_upgrade_{table.name}")
+    ddl = str(CreateTable(table).compile(dialect=conn.dialect))
+    conn.exec_driver_sql(
+        ddl.replace(f"CREATE TABLE {old_name}", f"CREATE TABLE {new_name}", 1)
+    )
+
+    existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+    names, values, params = [], [], {}
+    for column in table.columns:
+        names.append(preparer.quote(column.name))
+        if column.name in existing:
+            values.append(preparer.quote(column.name))
+            continue
+        value_sql, value = _fill_value(conn, column)
+        values.append(value_sql)
+        params[column.name] = value
+    try:
+        conn.execute(
+            text(
+                f"INSERT INTO {new_name} ({', '.join(names)}) "
+                f"SELECT {', '.join(values)} FROM {old_name}"
+            ),
+            params,
+        )
+    except IntegrityError as error:
+        # Например, повторные отзывы одного автора до ограничения уникальности
+        raise SchemaUpgradeError(f"Cannot copy rows of {table.name}: {error.orig}")
+    conn.exec_driver_sql(f"DROP TABLE {old_name}")
+    conn.exec_driver_sql(f"ALTER TABLE {new_name} RENAME TO {old_name}")
+    for index in table.indexes:
+        index.create(conn)
+
+
+def _upgrade(conn: Connection) -> list[str]:
+    changes = get_schema_changes(conn)
+    if not changes:
+        return changes
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    for table in models.Base.metadata.sorted_tables:
+        if table.name not in tables:
+            table.create(conn)
+        elif _needs_rebuild(inspector, table):
+            _rebuild_table(conn, table)
+        else:
+            for index in _outdated_indexes(inspector, table):
+                index.drop(conn, checkfirst=True)
+                index.create(conn)
+    # Пересоздание title удаляет и триггеры полнотекстового индекса
+    for statement in TITLE_FTS_DDL:
+        conn.exec_driver_sql(statement)
+    conn.exec_driver_sql(TITLE_FTS_REBUILD)
+
+    violations = conn.exec_driver_sql("PRAGMA foreign_key_check").all()
+    if violations:
+        raise SchemaUpgradeError(
+            f"Existing rows violate foreign keys: {violations[:10]}"
+        )
+    return changes
+
+
+async def upgrade_schema(engine: AsyncEngine) -> list[str]:
+    # Вся миграция в одной транзакции: при ошибке база остаётся прежней.
+    # PRAGMA foreign_keys действует только вне транзакции, поэтому BEGIN
+    # и COMMIT выполняются вручную на соединении в режиме AUTOCOMMIT
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        try:
+            await conn.exec_driver_sql("BEGIN")
+            try:
+                changes = await conn.run_sync(_upgrade)
+            except BaseException:
+                await conn.exec_driver_sql("ROLLBACK")
+                raise
+            await conn.exec_driver_sql("COMMIT")
+        finally:
+            await conn.exec_driver_sql("PRAGMA foreign_keys=ON")
+    return changes
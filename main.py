@@ -1,25 +1,77 @@
 import asyncio
+import time
+from contextlib import asynccontextmanager
 
 import uvicorn
-from fastapi import FastAPI, status
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.exceptions import ValidationException
 
-from db.database import init_models
+from config import SERVER_TIMING
+from db.database import async_engine, init_models, read_engine
+from db.query_stats import (
+    RequestQueries,
+    request_queries,
+    route_query_stats,
+    server_timing,
+)
 from api.login import loginroute
 from api.users import usersrouter
 from api.categories import categoryrouter
 from api.genres import genresrouter
 from api.titles import titlesrouter
+from api.exports import exportrouter
+from api.imports import importrouter
+from api.purges import purgesrouter
+from api.stats import statsrouter
+from utils.outbox_worker import outbox_worker
+from utils.purge_worker import purge_worker
+from utils.response_cache import response_cache_backend
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    outbox_worker.start()
+    purge_worker.start()
+    yield
+    await outbox_worker.stop()
+    await purge_worker.stop()
+    await response_cache_backend.close()
+    await async_engine.dispose()
+    await read_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.include_router(loginroute, prefix="/auth")
 app.include_router(usersrouter, prefix="/users")
 app.include_router(categoryrouter, prefix="/categories")
 app.include_router(genresrouter, prefix="/genres")
 app.include_router(titlesrouter, prefix="/titles")
+app.include_router(exportrouter, prefix="/export")
+app.include_router(importrouter, prefix="/import")
+app.include_router(purgesrouter, prefix="/purges")
+app.include_router(statsrouter, prefix="/stats")
+
+
+@app.middleware("http")
+async def count_sql_queries(request: Request, call_next):
+    # Для потоковых ответов учитываются только запросы до отправки заголовков
+    queries = RequestQueries()
+    token = request_queries.set(queries)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        request_queries.reset(token)
+    route = request.scope.get("route")
+    if route is not None:
+        route_query_stats.record(f"{request.method} {route.path}", queries)
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = server_timing(
+            queries, time.perf_counter() - started
+        )
+    return response
 
 
 @app.exception_handler(ValidationException)
@@ -34,6 +86,15 @@ async def index():
     return "Blogicum Fastapi"
 
 
+async def prepare_database():
+    # Соединения пула держат потоки aiosqlite, без dispose процесс не завершится
+    try:
+        await init_models()
+    finally:
+        await async_engine.dispose()
+        await read_engine.dispose()
+
+
 if __name__ == "__main__":
-    asyncio.run(init_models())
+    asyncio.run(prepare_database())
     uvicorn.run(app="main:app", host="127.0.0.1", port=8000, reload=True)
@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import os
+
+from sqlalchemy.exc import IntegrityError
+
+from config import IMPORT_BATCH_SIZE
+from crud.import_repository import import_datasets
+from crud.titles_repository import (
+    rebuild_title_documents,
+    rebuild_titles_search_index,
+    recalculate_titles_rating,
+)
+from db.database import async_engine, async_session
+from db.schema_upgrade import SchemaUpgradeError, upgrade_schema
+from utils.import_formats import (
+    DATASET_ORDER,
+    ImportDataError,
+    dataset_from_filename,
+    parse_rows,
+)
+
+
+async def recalculate_ratings(args: argparse.Namespace):
+    async with async_session() as session:
+        await recalculate_titles_rating(session)
+
+
+async def rebuild_search_index(args: argparse.Namespace):
+    async with async_session() as session:
+        await rebuild_titles_search_index(session)
+
+
+async def rebuild_documents(args: argparse.Namespace):
+    async with async_session() as session:
+        await rebuild_title_documents(session)
+
+
+async def upgrade_database(args: argparse.Namespace):
+    try:
+        changes = await upgrade_schema(async_engine)
+    except SchemaUpgradeError as error:
+        raise SystemExit(f"Upgrade failed: {error}")
+    if not changes:
+        print("Schema is up to date")
+        return
+    for change in changes:
+        print(change)
+    # Новые колонки rating_sum/rating_count и документы произведений
+    # заполняются из уже существующих отзывов
+    async with async_session() as session:
+        await recalculate_titles_rating(session)
+
+
+def _import_files(paths: list[str]) -> list[str]:
+    # В каталоге берутся только файлы известных наборов, остальные пропускаются
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for name in sorted(os.listdir(path)):
+            try:
+                dataset_from_filename(name)
+            except ImportDataError:
+                print(f"skipped: {os.path.join(path, name)}")
+                continue
+            files.append(os.path.join(path, name))
+    return files
+
+
+async def import_data(args: argparse.Namespace):
+    try:
+        datasets = []
+        for path in _import_files(args.paths):
+            dataset, import_format = dataset_from_filename(path)
+            with open(path, "rb") as file:
+                datasets.append((dataset, parse_rows(file.read(), import_format)))
+        datasets.sort(key=lambda item: DATASET_ORDER.index(item[0]))
+
+        async with async_session() as session:
+            report = await import_datasets(session, datasets, args.batch_size)
+    except ImportDataError as error:
+        raise SystemExit(f"Import failed: {error}")
+    except IntegrityError as error:
+        raise SystemExit(f"Import conflicts with existing data: {error.orig}")
+    for item in report.datasets:
+        print(
+            f"{item.dataset}: {item.rows} rows in {item.seconds}s "
+            f"({item.rows_per_second} rows/s)"
+        )
+    print(
+        f"total: {report.rows} rows in {report.seconds}s "
+        f"({report.rows_per_second} rows/s)"
+    )
+
+
+async def run(args: argparse.Namespace):
+    # Соединения пула держат потоки aiosqlite, без dispose процесс не завершится
+    try:
+        await args.handler(args)
+    finally:
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YaMDb management commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    recalculate = subparsers.add_parser(
+        "recalculate_ratings",
+        help="Recompute rating_sum/rating_count of every title from its reviews",
+    )
+    recalculate.set_defaults(handler=recalculate_ratings)
+
+    search_index = subparsers.add_parser(
+        "rebuild_search_index",
+        help="Create the title full-text index if needed and refill it",
+    )
+    search_index.set_defaults(handler=rebuild_search_index)
+
+    documents = subparsers.add_parser(
+        "rebuild_title_documents",
+        help="Regenerate the precomputed JSON document of every title",
+    )
+    documents.set_defaults(handler=rebuild_documents)
+
+    upgrade = subparsers.add_parser(
+        "upgrade_schema",
+        help="Bring an existing database to the current models: add tables, "
+        "columns, foreign keys, unique constraints and indexes",
+    )
+    upgrade.set_defaults(handler=upgrade_database)
+
+    importer = subparsers.add_parser(
+        "import_data",
+        help="Bulk import JSON/CSV files in the YaMDb fixture format "
+        "(a directory imports every known file in dependency order)",
+    )
+    importer.add_argument("paths", nargs="+", help="Files or directories to import")
+    importer.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    importer.set_defaults(handler=import_data)
+
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,7 @@
 from .user import User
 from .review import Category, Genre, Title, Review, Comment
+from .search import title_fts
+from .document import TitleDocument
+from .outbox import OutboxEmail
+from .purge import PurgeJob
 from .base import Base
@@ -1,5 +1,12 @@
+from datetime import datetime, timezone
+
 from sqlalchemy.orm import DeclarativeBase
 
 
+# Наивное UTC-время с микросекундами: по нему строятся ETag и Last-Modified
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class Base(DeclarativeBase):
     pass
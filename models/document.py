@@ -0,0 +1,15 @@
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models.base import Base
+
+
+# Готовый JSON произведения в формате TitleOut: чтение каталога отдаёт его
+# как есть, без join'ов и сериализации на каждый запрос
+class TitleDocument(Base):
+    __tablename__ = "title_document"
+
+    title_id: Mapped[int] = mapped_column(
+        ForeignKey("title.id", ondelete="CASCADE"), primary_key=True
+    )
+    document: Mapped[str]
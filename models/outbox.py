@@ -0,0 +1,35 @@
+from datetime import datetime
+from enum import Enum as PyEnum
+from typing import Optional
+
+from sqlalchemy import DateTime, Enum, Index, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from config import MAX_EMAIL_LENGTH, MAX_FIELD_LENGTH
+from models.base import Base
+
+
+class OutboxStatus(PyEnum):
+    PENDING = "pending"
+    FAILED = "failed"
+
+
+class OutboxEmail(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    recipient: Mapped[str] = mapped_column(String(MAX_EMAIL_LENGTH))
+    subject: Mapped[str] = mapped_column(String(MAX_FIELD_LENGTH))
+    body: Mapped[str]
+    status: Mapped[OutboxStatus] = mapped_column(
+        Enum(OutboxStatus, values_callable=lambda obj: [e.value for e in obj]),
+        default=OutboxStatus.PENDING.value,
+        server_default=OutboxStatus.PENDING.value,
+    )
+    attempts: Mapped[int] = mapped_column(default=0, server_default="0")
+    last_error: Mapped[Optional[str]]
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
@@ -0,0 +1,43 @@
+from datetime import datetime
+from enum import Enum as PyEnum
+from typing import Optional
+
+from sqlalchemy import DateTime, Enum, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models.base import Base, utcnow
+
+
+class PurgeTarget(PyEnum):
+    TITLE = "title"
+    USER = "user"
+
+
+class PurgeStatus(PyEnum):
+    PENDING = "pending"
+    DONE = "done"
+
+
+# Задание на фоновую очистку помеченной на удаление строки и её дочерних записей
+class PurgeJob(Base):
+    __tablename__ = "purge_job"
+    __table_args__ = (Index("ix_purge_job_status_id", "status", "id"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    target: Mapped[PurgeTarget] = mapped_column(
+        Enum(PurgeTarget, values_callable=lambda obj: [e.value for e in obj])
+    )
+    target_id: Mapped[int]
+    status: Mapped[PurgeStatus] = mapped_column(
+        Enum(PurgeStatus, values_callable=lambda obj: [e.value for e in obj]),
+        default=PurgeStatus.PENDING.value,
+        server_default=PurgeStatus.PENDING.value,
+    )
+    deleted_rows: Mapped[int] = mapped_column(default=0, server_default="0")
+    batches: Mapped[int] = mapped_column(default=0, server_default="0")
+    last_error: Mapped[Optional[str]]
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=utcnow, onupdate=utcnow
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
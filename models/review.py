@@ -7,7 +7,9 @@ from sqlalchemy import (
     String,
     Integer,
     DateTime,
+    Index,
     Table,
+    UniqueConstraint,
     func,
     CheckConstraint,
 )
@@ -15,7 +17,7 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.orm import validates
 
 from config import MAX_FIELD_LENGTH, MAX_SLUG_LENGTH
-from models.base import Base
+from models.base import Base, utcnow
 
 
 genre_title = Table(
@@ -23,6 +25,8 @@ genre_title = Table(
     Base.metadata,
     Column("genre_id", ForeignKey("genre.id", ondelete="CASCADE"), primary_key=True),
     Column("title_id", ForeignKey("title.id", ondelete="CASCADE"), primary_key=True),
+    # Первичный ключ начинается с genre_id, жанры произведения ищутся по этому
+    Index("ix_genre_title_title_id", "title_id"),
 )
 
 
@@ -33,7 +37,9 @@ class Category(Base):
     name: Mapped[str] = mapped_column(String(MAX_FIELD_LENGTH))
     slug: Mapped[str] = mapped_column(String(MAX_SLUG_LENGTH), unique=True)
 
-    titles: Mapped[list["Title"]] = relationship("Title", back_populates="category")
+    titles: Mapped[list["Title"]] = relationship(
+        "Title", back_populates="category", passive_deletes=True
+    )
 
 
 class Genre(Base):
@@ -44,7 +50,7 @@ class Genre(Base):
     slug: Mapped[str] = mapped_column(String(MAX_SLUG_LENGTH), unique=True)
 
     titles: Mapped[list["Title"]] = relationship(
-        secondary=genre_title, back_populates="genres"
+        secondary=genre_title, back_populates="genres", passive_deletes=True
     )
 
 
@@ -55,16 +61,30 @@ class Title(Base):
     name: Mapped[str] = mapped_column(String(MAX_FIELD_LENGTH))
     year: Mapped[int]
     description: Mapped[Optional[str]]
+    rating_sum: Mapped[int] = mapped_column(default=0, server_default="0")
+    rating_count: Mapped[int] = mapped_column(default=0, server_default="0")
     category_id: Mapped[int] = mapped_column(
-        ForeignKey("category.id", ondelete="SET NULL"), nullable=True
+        ForeignKey("category.id", ondelete="SET NULL"), nullable=True, index=True
     )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=utcnow, onupdate=utcnow
+    )
+    # Отметка об удалении: строка уже скрыта от чтения и ждёт фоновой очистки
+    deleted_at: Mapped[Optional[datetime]] = mapped_column(DateTime, index=True)
     genres: Mapped[list["Genre"]] = relationship(
-        secondary=genre_title, back_populates="titles"
+        secondary=genre_title,
+        back_populates="titles",
+        passive_deletes=True,
+        order_by="Genre.slug",
     )
 
     category: Mapped["Category"] = relationship("Category", back_populates="titles")
+    # Дочерние строки удаляет сама база (ON DELETE CASCADE), ORM их не загружает
     reviews: Mapped[list["Review"]] = relationship(
-        "Review", back_populates="title", cascade="all, delete-orphan"
+        "Review",
+        back_populates="title",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     @validates("year")
@@ -77,31 +97,53 @@ class Title(Base):
 
 class Review(Base):
     __tablename__ = "review"
+    __table_args__ = (
+        Index("ix_review_title_id_pub_date_id", "title_id", "pub_date", "id"),
+        Index("ix_review_title_id_updated_at", "title_id", "updated_at"),
+        UniqueConstraint("author_id", "title_id", name="uq_review_author_id_title_id"),
+    )
+    # id и pub_date возвращаются из того же INSERT ... RETURNING
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(primary_key=True)
     text: Mapped[str]
     score: Mapped[int] = mapped_column(
         Integer, CheckConstraint("score >= 1 AND score <= 10"), nullable=False
     )
-    author_id: Mapped[int] = mapped_column(ForeignKey("user.id"))
-    title_id: Mapped[int] = mapped_column(ForeignKey("title.id"))
+    author_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"))
+    title_id: Mapped[int] = mapped_column(ForeignKey("title.id", ondelete="CASCADE"))
     pub_date: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=utcnow, onupdate=utcnow
+    )
 
     author = relationship("User", back_populates="reviews")
     title: Mapped["Title"] = relationship("Title", back_populates="reviews")
     comments: Mapped[list["Comment"]] = relationship(
-        "Comment", back_populates="review", cascade="all, delete-orphan"
+        "Comment",
+        back_populates="review",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
 
 class Comment(Base):
     __tablename__ = "comment"
+    __table_args__ = (
+        Index("ix_comment_review_id_pub_date_id", "review_id", "pub_date", "id"),
+        Index("ix_comment_review_id_updated_at", "review_id", "updated_at"),
+        Index("ix_comment_author_id", "author_id"),
+    )
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(primary_key=True)
     text: Mapped[str]
-    author_id: Mapped[int] = mapped_column(ForeignKey("user.id"))
-    review_id: Mapped[int] = mapped_column(ForeignKey("review.id"))
+    author_id: Mapped[int] = mapped_column(ForeignKey("user.id", ondelete="CASCADE"))
+    review_id: Mapped[int] = mapped_column(ForeignKey("review.id", ondelete="CASCADE"))
     pub_date: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=utcnow, onupdate=utcnow
+    )
 
     author = relationship("User", back_populates="comments")
     review: Mapped["Review"] = relationship("Review", back_populates="comments")
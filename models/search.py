@@ -0,0 +1,48 @@
+from sqlalchemy import DDL, column, event, table
+
+from models.review import Title
+
+
+# Внешний (external content) FTS5-индекс: тексты хранятся только в title,
+# а title_fts держит инвертированный индекс и синхронизируется триггерами.
+title_fts = table("title_fts", column("rowid"), column("name"), column("description"))
+
+TITLE_FTS_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS title_fts USING fts5(
+        name, description, content='title', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS title_fts_after_insert AFTER INSERT ON title
+    BEGIN
+        INSERT INTO title_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS title_fts_after_delete AFTER DELETE ON title
+    BEGIN
+        INSERT INTO title_fts(title_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS title_fts_after_update
+    AFTER UPDATE OF name, description ON title
+    BEGIN
+        INSERT INTO title_fts(title_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO title_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+)
+
+TITLE_FTS_REBUILD = "INSERT INTO title_fts(title_fts) VALUES ('rebuild')"
+
+
+for statement in TITLE_FTS_DDL:
+    event.listen(
+        Title.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
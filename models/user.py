@@ -1,8 +1,10 @@
 import re
+from datetime import datetime
 from typing import Optional
 from enum import Enum as PyEnum
 
 from sqlalchemy import (
+    DateTime,
     String,
     Enum,
 )
@@ -39,12 +41,21 @@ class User(Base):
         server_default=UserRoles.USER.value,
     )
     confirmation_code: Mapped[Optional[str]]
+    # Отметка об удалении: строка уже скрыта от чтения и ждёт фоновой очистки
+    deleted_at: Mapped[Optional[datetime]] = mapped_column(DateTime, index=True)
 
+    # Отзывы и комментарии удаляются каскадом в базе, без загрузки в сессию
     reviews = relationship(
-        "Review", back_populates="author", cascade="all, delete-orphan"
+        "Review",
+        back_populates="author",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     comments = relationship(
-        "Comment", back_populates="author", cascade="all, delete-orphan"
+        "Comment",
+        back_populates="author",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     @validates("username")
@@ -0,0 +1,25 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+from schemas.review_schema import TitleCreate
+
+
+class DatasetImport(BaseModel):
+    dataset: str
+    rows: int
+    seconds: float
+    rows_per_second: float
+
+
+class ImportReport(BaseModel):
+    datasets: list[DatasetImport]
+    rows: int
+    seconds: float
+    rows_per_second: float
+
+
+class TitleImport(TitleCreate):
+    # Жанры и категория в наборе titles необязательны, остальные проверки те же
+    genre: list[str] = []
+    category: Optional[str] = None
@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+from models.purge import PurgeStatus, PurgeTarget
+
+
+class PurgeJobOut(BaseModel):
+    id: int
+    target: PurgeTarget
+    target_id: int
+    status: PurgeStatus
+    deleted_rows: int
+    batches: int
+    last_error: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
@@ -56,7 +56,7 @@ class TitleOut(BaseModel):
     rating: Optional[float]
     description: Optional[str]
     genres: list[GenreBase]
-    category: CategoryBase
+    category: Optional[CategoryBase]
 
 
 class ReviewCreate(BaseModel):
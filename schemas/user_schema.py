@@ -11,6 +11,24 @@ class UserAuth(BaseModel):
     id: int
 
 
+class CurrentUser(BaseModel):
+    id: int
+    username: str
+    role: UserRoles
+    is_superuser: bool
+
+    class Config:
+        from_attributes = True
+
+    @property
+    def is_admin(self):
+        return self.role == UserRoles.ADMIN or self.is_superuser
+
+    @property
+    def is_moderator(self):
+        return self.role == UserRoles.MODERATOR
+
+
 class UserCreate(BaseModel):
     username: str = Field(max_length=MAX_USERNAME_LENGTH, pattern=r"^[\w.@+-]+$")
     email: EmailStr = Field(max_length=MAX_EMAIL_LENGTH)
@@ -1,12 +1,59 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
 from passlib.context import CryptContext
 
+from config import PWD_HASH_MAX_WORKERS
+
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt отпускает GIL, поэтому хватает отдельного пула потоков:
+# event loop не блокируется, а число одновременных хэширований ограничено
+pwd_executor = ThreadPoolExecutor(
+    max_workers=PWD_HASH_MAX_WORKERS, thread_name_prefix="pwd-hash"
+)
+_stats_lock = threading.Lock()
+_stats = {"queued": 0, "running": 0, "completed": 0, "max_queued": 0}
+
+
+def get_pwd_hashing_stats() -> dict[str, int]:
+    with _stats_lock:
+        return {**_stats, "max_workers": PWD_HASH_MAX_WORKERS}
+
+
+def _run_tracked(func: Callable[..., Any], *args: Any) -> Any:
+    with _stats_lock:
+        _stats["queued"] -= 1
+        _stats["running"] += 1
+    try:
+        return func(*args)
+    finally:
+        with _stats_lock:
+            _stats["running"] -= 1
+            _stats["completed"] += 1
+
+
+def _forget_cancelled(future: Future) -> None:
+    if future.cancelled():
+        with _stats_lock:
+            _stats["queued"] -= 1
+
+
+async def _run_in_pool(func: Callable[..., Any], *args: Any) -> Any:
+    with _stats_lock:
+        _stats["queued"] += 1
+        _stats["max_queued"] = max(_stats["max_queued"], _stats["queued"])
+    future = pwd_executor.submit(_run_tracked, func, *args)
+    future.add_done_callback(_forget_cancelled)
+    return await asyncio.wrap_future(future)
+
 
-def verify_code(plain_code, hashed_code):
-    return pwd_context.verify(plain_code, hashed_code)
+async def verify_code(plain_code, hashed_code):
+    return await _run_in_pool(pwd_context.verify, plain_code, hashed_code)
 
 
-def get_hashed_code(password):
-    return pwd_context.hash(password)
+async def get_hashed_code(password):
+    return await _run_in_pool(pwd_context.hash, password)
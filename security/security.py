@@ -7,10 +7,12 @@ from fastapi import HTTPException, status, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import config as config
-from crud.user_repository import get_user_by_username
+from crud.user_repository import get_user_by_id, get_user_by_username
+from db.database import get_session
 from models.user import User
-from schemas.user_schema import UserAuth
+from schemas.user_schema import CurrentUser, UserAuth
 from security.pwd_crypt import verify_code
+from security.user_cache import user_cache
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
@@ -20,7 +22,7 @@ async def authenticate_user(
     session: AsyncSession, username: str, code: str
 ) -> Optional[User]:
     user = await get_user_by_username(session, username)
-    if not user or not verify_code(code, user.confirmation_code):
+    if not user or not await verify_code(code, user.confirmation_code):
         return None
     return user
 
@@ -52,3 +54,22 @@ def get_user_from_token(token: str = Depends(oauth2_scheme)):
             detail="Invalid token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+
+# Текущий пользователь из кэша, в БД идём только при промахе
+async def get_current_user(
+    user_auth_data: UserAuth = Depends(get_user_from_token),
+    session: AsyncSession = Depends(get_session),
+) -> CurrentUser:
+    current_user = user_cache.get(user_auth_data.id)
+    if current_user is None:
+        user = await get_user_by_id(session, user_auth_data.id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        current_user = CurrentUser.model_validate(user)
+        user_cache.set(current_user.id, current_user)
+    return current_user
@@ -0,0 +1,6 @@
+from config import USER_CACHE_MAX_SIZE, USER_CACHE_TTL
+from utils.cache import TTLCache
+
+
+# Данные аутентифицированных пользователей: id -> CurrentUser
+user_cache = TTLCache(max_size=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL)
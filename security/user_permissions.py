@@ -4,9 +4,10 @@ from fastapi import HTTPException, status
 
 from models.review import Review, Comment
 from models.user import User
+from schemas.user_schema import CurrentUser
 
 
-def is_admin(user: User) -> bool:
+def is_admin(user: Union[User, CurrentUser]) -> bool:
     if user.is_admin:
         return True
     raise HTTPException(
@@ -14,7 +15,9 @@ def is_admin(user: User) -> bool:
     )
 
 
-def is_admin_moderator_or_author(user: User, obj: Union[Review, Comment]) -> bool:
+def is_admin_moderator_or_author(
+    user: Union[User, CurrentUser], obj: Union[Review, Comment]
+) -> bool:
     if user.is_admin or user.is_moderator or user.id == obj.author_id:
         return True
     raise HTTPException(
@@ -0,0 +1,80 @@
+import os
+import smtplib
+from datetime import datetime
+from email.message import EmailMessage
+from typing import Optional, Protocol
+
+import config
+
+
+class EmailTransport(Protocol):
+    def send(self, recipient: str, subject: str, body: str) -> None: ...
+
+
+class FileTransport:
+    def __init__(self, email_dir: str):
+        self.email_dir = email_dir
+
+    def send(self, recipient: str, subject: str, body: str) -> None:
+        # Create a directory to store emails if it doesn't exist
+        os.makedirs(self.email_dir, exist_ok=True)
+
+        # Generate a unique filename
+        email_filename = recipient.replace(".", "_")
+        filename = (
+            f"Email_to_{email_filename}_"
+            f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S-%f')}.txt"
+        )
+
+        # Write the email content to a file
+        filepath = os.path.join(self.email_dir, filename)
+        with open(filepath, "w") as file:
+            file.write(f"Subject: {subject}\n\n")
+            file.write(body)
+
+
+class SMTPTransport:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        sender: str,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        timeout: float = 10,
+    ):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+
+    def send(self, recipient: str, subject: str, body: str) -> None:
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = recipient
+        message["Subject"] = subject
+        message.set_content(body)
+
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(message)
+
+
+def get_email_transport() -> EmailTransport:
+    if config.EMAIL_TRANSPORT == "smtp":
+        return SMTPTransport(
+            host=config.SMTP_HOST,
+            port=config.SMTP_PORT,
+            sender=config.EMAIL_FROM,
+            username=config.SMTP_USERNAME,
+            password=config.SMTP_PASSWORD,
+            use_tls=config.SMTP_USE_TLS,
+        )
+    return FileTransport(config.EMAIL_DIR)
@@ -0,0 +1,76 @@
+import csv
+import io
+import os
+from typing import Any, Optional
+
+import orjson
+
+
+class ImportDataError(Exception):
+    pass
+
+
+# Имена файлов из фикстур YaMDb (static/data) и имена наборов в API
+DATASET_ALIASES = {
+    "users": "users",
+    "category": "categories",
+    "categories": "categories",
+    "genre": "genres",
+    "genres": "genres",
+    "titles": "titles",
+    "genre_title": "genre_title",
+    "review": "reviews",
+    "reviews": "reviews",
+    "comments": "comments",
+}
+
+# В CSV-фикстурах YaMDb эти колонки содержат id, а не slug или username
+FIXTURE_ID_COLUMNS = {"category": "category_id", "author": "author_id"}
+
+# Порядок, в котором наборы ссылаются друг на друга
+DATASET_ORDER = (
+    "users",
+    "categories",
+    "genres",
+    "titles",
+    "genre_title",
+    "reviews",
+    "comments",
+)
+
+
+def get_dataset(name: str) -> str:
+    dataset = DATASET_ALIASES.get(name.lower())
+    if not dataset:
+        raise ImportDataError(f"Unknown dataset: {name}")
+    return dataset
+
+
+def dataset_from_filename(path: str) -> tuple[str, str]:
+    name, extension = os.path.splitext(os.path.basename(path))
+    return get_dataset(name), extension.lstrip(".").lower()
+
+
+def parse_rows(content: bytes, import_format: Optional[str]) -> list[dict[str, Any]]:
+    if import_format in ("json", "application/json"):
+        try:
+            rows = orjson.loads(content)
+        except orjson.JSONDecodeError as e:
+            raise ImportDataError(f"Invalid JSON: {e}")
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise ImportDataError("JSON import must be an array of objects")
+        return rows
+    if import_format in ("csv", "text/csv"):
+        try:
+            text = content.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise ImportDataError("CSV import must be UTF-8")
+        # Пустые ячейки CSV означают отсутствие значения
+        return [
+            {
+                FIXTURE_ID_COLUMNS.get(key, key): value if value != "" else None
+                for key, value in row.items()
+            }
+            for row in csv.DictReader(io.StringIO(text))
+        ]
+    raise ImportDataError(f"Unsupported import format: {import_format}")
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Optional
+
+import config
+from crud.outbox_repository import (
+    claim_outbox_emails,
+    delete_sent_emails,
+    reschedule_outbox_email,
+)
+from db.database import async_session
+from utils.email_transports import EmailTransport, get_email_transport
+
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxWorker:
+    def __init__(
+        self,
+        transport: EmailTransport,
+        batch_size: int = config.OUTBOX_BATCH_SIZE,
+        poll_interval: float = config.OUTBOX_POLL_INTERVAL,
+    ):
+        self.transport = transport
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._wakeup = None
+
+    def notify(self) -> None:
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed = await self.drain_once()
+            except Exception:
+                logger.exception("Email outbox batch failed")
+                processed = 0
+            if processed < self.batch_size:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def drain_once(self) -> int:
+        async with async_session() as session:
+            emails = await claim_outbox_emails(
+                session,
+                self.batch_size,
+                timedelta(seconds=config.OUTBOX_LEASE_SECONDS),
+            )
+            sent_ids = []
+            for email in emails:
+                try:
+                    await asyncio.to_thread(
+                        self.transport.send, email.recipient, email.subject, email.body
+                    )
+                except Exception as exc:
+                    logger.warning("Failed to send email %s: %s", email.id, exc)
+                    await reschedule_outbox_email(
+                        session,
+                        email,
+                        str(exc),
+                        timedelta(seconds=config.OUTBOX_RETRY_DELAY_SECONDS),
+                        config.OUTBOX_MAX_ATTEMPTS,
+                    )
+                else:
+                    sent_ids.append(email.id)
+            await delete_sent_emails(session, sent_ids)
+            return len(emails)
+
+
+outbox_worker = OutboxWorker(get_email_transport())
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from typing import Optional
+
+import config
+from crud.purge_repository import get_next_purge_job, purge_batch, record_purge_error
+from db.database import async_session
+
+
+logger = logging.getLogger(__name__)
+
+
+class PurgeWorker:
+    def __init__(
+        self,
+        batch_size: int = config.PURGE_BATCH_SIZE,
+        batch_interval: float = config.PURGE_BATCH_INTERVAL,
+        poll_interval: float = config.PURGE_POLL_INTERVAL,
+    ):
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._wakeup = None
+
+    def notify(self) -> None:
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                purged = await self.purge_once()
+            except Exception:
+                logger.exception("Purge batch failed")
+                purged = False
+            if purged:
+                # Пауза между пачками отдаёт блокировку записи остальным писателям
+                await asyncio.sleep(self.batch_interval)
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def purge_once(self) -> bool:
+        # Незаконченные задания переживают перезапуск: очистка продолжится с места
+        async with async_session() as session:
+            job = await get_next_purge_job(session)
+            if not job:
+                return False
+            job_id = job.id
+            try:
+                await purge_batch(session, job, self.batch_size)
+            except Exception as exc:
+                logger.warning("Failed to purge job %s: %s", job_id, exc)
+                await session.rollback()
+                await record_purge_error(session, job_id, str(exc))
+                return False
+            return True
+
+
+purge_worker = PurgeWorker()
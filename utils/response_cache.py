@@ -0,0 +1,221 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Optional, Protocol
+
+import config
+from utils.cache import TTLCache
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCacheError(Exception):
+    pass
+
+
+class ResponseCacheBackend(Protocol):
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    async def set(self, key: str, value: bytes) -> None: ...
+
+    async def incr(self, key: str) -> int: ...
+
+    async def close(self) -> None: ...
+
+
+class MemoryBackend:
+    def __init__(self, max_size: int, ttl: float):
+        self._values = TTLCache(max_size=max_size, ttl=ttl)
+        self._counters: dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if key in self._counters:
+            return str(self._counters[key]).encode()
+        return self._values.get(key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        self._values.set(key, value)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        # Записи прошлых поколений больше недостижимы, память можно отдать сразу
+        self._values.clear()
+        return self._counters[key]
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisBackend:
+    # Минимальный клиент протокола RESP: нужны только GET, SET EX и INCR,
+    # поэтому подойдёт Redis, KeyDB, Valkey или любой локальный заменитель
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        ttl: int,
+        db: int = 0,
+        password: Optional[str] = None,
+        timeout: float = 1,
+    ):
+        self.host = host
+        self.port = port
+        self.ttl = ttl
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._command("GET", key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        await self._command("SET", key, value, "EX", self.ttl)
+
+    async def incr(self, key: str) -> int:
+        return await self._command("INCR", key)
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._disconnect()
+
+    async def _command(self, *args: Any) -> Any:
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await self._connect()
+                return await self._execute(*args)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                await self._disconnect()
+                raise ResponseCacheError(f"Redis is unavailable: {e}") from e
+            except BaseException:
+                # Отмена между записью команды и чтением ответа оставляет ответ
+                # в сокете: следующая команда прочла бы чужой. Соединение бросаем
+                self._abort()
+                raise
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        if self.password:
+            await self._execute("AUTH", self.password)
+        if self.db:
+            await self._execute("SELECT", self.db)
+
+    async def _disconnect(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+        self._reader = self._writer = None
+
+    def _abort(self) -> None:
+        # Без ожидания: вызывается в том числе из уже отменяемой задачи
+        if self._writer is not None:
+            self._writer.transport.abort()
+        self._reader = self._writer = None
+
+    async def _execute(self, *args: Any) -> Any:
+        self._writer.write(_encode_command(args))
+        await self._writer.drain()
+        return await asyncio.wait_for(self._read_reply(), self.timeout)
+
+    async def _read_reply(self) -> Any:
+        line = await self._reader.readuntil(b"\r\n")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode()
+        if prefix == b"-":
+            raise ResponseCacheError(payload.decode())
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise ResponseCacheError(f"Unexpected Redis reply: {line!r}")
+
+
+def _encode_command(args: tuple) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+class ResponseCache:
+    # Ключ включает номер поколения пространства имён: сброс — это один INCR,
+    # а ответы, собранные до записи, попадают под старое поколение и не читаются
+    def __init__(self, backend: ResponseCacheBackend, namespace: str):
+        self.backend = backend
+        self.namespace = namespace
+        self._generation_key = f"{namespace}:generation"
+
+    async def get_key(self, params: dict[str, Any]) -> Optional[str]:
+        try:
+            generation = await self.backend.get(self._generation_key)
+        except ResponseCacheError:
+            logger.warning("Response cache is unavailable", exc_info=True)
+            return None
+        encoded_params = json.dumps(params, sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha256(encoded_params.encode()).hexdigest()
+        return f"{self.namespace}:{int(generation or 0)}:{digest}"
+
+    async def get(self, key: Optional[str]) -> Optional[bytes]:
+        if key is None:
+            return None
+        try:
+            return await self.backend.get(key)
+        except ResponseCacheError:
+            logger.warning("Response cache is unavailable", exc_info=True)
+            return None
+
+    async def set(self, key: Optional[str], value: bytes) -> None:
+        if key is None:
+            return
+        try:
+            await self.backend.set(key, value)
+        except ResponseCacheError:
+            logger.warning("Response cache is unavailable", exc_info=True)
+
+    async def invalidate(self) -> None:
+        try:
+            await self.backend.incr(self._generation_key)
+        except ResponseCacheError:
+            logger.warning("Could not invalidate response cache", exc_info=True)
+
+
+def get_response_cache_backend() -> ResponseCacheBackend:
+    if config.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisBackend(
+            host=config.REDIS_HOST,
+            port=config.REDIS_PORT,
+            ttl=config.RESPONSE_CACHE_TTL,
+            db=config.REDIS_DB,
+            password=config.REDIS_PASSWORD,
+        )
+    return MemoryBackend(
+        max_size=config.RESPONSE_CACHE_MAX_SIZE, ttl=config.RESPONSE_CACHE_TTL
+    )
+
+
+response_cache_backend = get_response_cache_backend()
+
+# Закодированные страницы GET /titles/
+titles_response_cache = ResponseCache(response_cache_backend, namespace="titles")
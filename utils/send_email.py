@@ -1,24 +1,16 @@
-import os
-from datetime import datetime
-
 from pydantic import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from crud.outbox_repository import create_outbox_email
+from utils.outbox_worker import outbox_worker
 
-async def send_confirmation_code(email: EmailStr, code: str):
-    # Create a directory to store emails if it doesn't exist
-    email_dir = "sent_emails"
-
-    if not os.path.exists(email_dir):
-        os.makedirs(email_dir)
 
-    # Generate a unique filename
-    email_filename = email.replace(".", "_")
-    filename = (
-        f"Email_to_{email_filename}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.txt"
+async def send_confirmation_code(session: AsyncSession, email: EmailStr, code: str):
+    # Письмо только кладётся в outbox, отправкой занимается фоновый воркер
+    await create_outbox_email(
+        session,
+        recipient=email,
+        subject="Confirmation code for token:",
+        body=f"Your confirmation code is: {code}",
     )
-
-    # Write the email content to a file
-    filepath = os.path.join(email_dir, filename)
-    with open(filepath, "w") as file:
-        file.write("Subject: Confirmation code for token:\n\n")
-        file.write(f"Your confirmation code is: {code}")
+    outbox_worker.notify()
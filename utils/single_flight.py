@@ -0,0 +1,78 @@
+import asyncio
+import functools
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+
+T = TypeVar("T")
+
+
+# Одновременные одинаковые вызовы выполняются один раз: первый становится
+# ведущим, остальные ждут его результат. Закончившийся вызов сразу забывается,
+# поэтому ответ никогда не старше запроса, который уже шёл в момент прихода
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self._stats: defaultdict[str, dict[str, int]] = defaultdict(
+            lambda: {"calls": 0, "executions": 0, "shared": 0}
+        )
+
+    async def do(
+        self, name: str, key: Hashable, fn: Callable[[], Awaitable[T]]
+    ) -> T:
+        stats = self._stats[name]
+        stats["calls"] += 1
+        call_key = (name, key)
+        while call_key in self._calls:
+            future = self._calls[call_key]
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Отменили ведущего, а не нас: повторяем и, возможно, ведём сами
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                continue
+            stats["shared"] += 1
+            return result
+
+        future = asyncio.get_running_loop().create_future()
+        # Исключение читают ожидающие; если их нет, asyncio не должен ругаться
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._calls[call_key] = future
+        stats["executions"] += 1
+        try:
+            result = await fn()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[call_key]
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {name: dict(values) for name, values in self._stats.items()}
+
+
+read_flight = SingleFlight()
+
+
+def coalesce_reads(name: str):
+    # Для read-only запросов из GET-ручек: результат выполняется в сессии
+    # ведущего и должен быть пригоден к чтению после её закрытия
+    def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(fn)
+        async def wrapper(session: Any, *args: Any) -> T:
+            return await read_flight.do(name, args, lambda: fn(session, *args))
+
+        return wrapper
+
+    return decorator
+
+
+def get_single_flight_stats() -> dict[str, dict[str, int]]:
+    return read_flight.stats()